@@ -0,0 +1,62 @@
+"""
+Measures the time a collector's exit spends on passing its results to the
+limits, as more and more limits (for other collectors) exist. Compares the
+LimitsDispatcher with every limit receiving every result via the signal, as
+it was done before
+
+    python benchmarks/limit_dispatch.py [nr of exits]
+"""
+import sys
+from timeit import default_timer
+import django
+from django.conf import settings
+from django.dispatch import Signal
+
+settings.configure(INSTALLED_APPS=['django_performance_testing'])
+django.setup()
+
+from django_performance_testing.core import NameValueResult  # noqa: E402
+from django_performance_testing.signals import \
+    results_collected  # noqa: E402
+from django_performance_testing.timing import \
+    TimeCollector, TimeLimit  # noqa: E402
+
+RESULTS = [NameValueResult(name='total', value=0.1)]
+
+
+def broadcast_to(limits):
+    signal = Signal(providing_args=['results', 'context'])
+    for limit in limits:
+        signal.connect(limit.results_collected_handler)
+    return signal
+
+
+def best_of(repeat, signal, collector, nr_of_exits):
+    timings = []
+    for _ in range(repeat):
+        start = default_timer()
+        for _ in range(nr_of_exits):
+            signal.send_robust(sender=collector, results=RESULTS, context={})
+        timings.append(default_timer() - start)
+    return min(timings)
+
+
+def main(nr_of_exits=2000, repeat=5):
+    collector = TimeCollector(id_='measured')
+    limits = [TimeLimit(collector_id='measured', total=1)]
+    print('{:>8} {:>14} {:>14}'.format(
+        'limits', 'broadcast', 'dispatcher'))
+    for nr_of_limits in [1, 10, 100, 1000]:
+        limits.extend(
+            TimeLimit(collector_id='other {}'.format(i), total=1)
+            for i in range(nr_of_limits - len(limits)))
+        timings = [
+            best_of(repeat, signal, collector, nr_of_exits)
+            for signal in [broadcast_to(limits), results_collected]]
+        print('{:>8} {:>11.2f} us {:>11.2f} us'.format(
+            nr_of_limits,
+            *(elapsed / nr_of_exits * 1e6 for elapsed in timings)))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,85 @@
+"""
+Compares classify_query with the implementation it replaced, over a corpus
+of the kind of SQL a test run collects: many queries, few distinct shapes
+
+    python benchmarks/query_classification.py [nr of queries]
+"""
+import sys
+from timeit import default_timer
+import django
+from django.conf import settings
+
+settings.configure(INSTALLED_APPS=['django_performance_testing'])
+django.setup()
+
+from django_performance_testing.queries import classify_query  # noqa: E402
+
+SHAPES = [
+    'SELECT "auth_user"."id", "auth_user"."password", "auth_user"."last_login"'
+    ', "auth_user"."is_superuser", "auth_user"."username" FROM "auth_user" '
+    'WHERE "auth_user"."id" = %s',
+    'SELECT "auth_group"."id", "auth_group"."name" FROM "auth_group" INNER '
+    'JOIN "auth_user_groups" ON ("auth_group"."id" = "auth_user_groups".'
+    '"group_id") WHERE "auth_user_groups"."user_id" = %s',
+    'SELECT COUNT(*) AS "__count" FROM "auth_permission"',
+    'INSERT INTO "auth_group" ("name") VALUES (%s)',
+    'UPDATE "auth_group" SET "name" = %s WHERE "auth_group"."id" = %s',
+    'DELETE FROM "auth_group" WHERE "auth_group"."id" IN (%s, %s, %s)',
+    'SAVEPOINT "s140035_x1"',
+    'RELEASE SAVEPOINT "s140035_x1"',
+    'QUERY = u\'SELECT "django_session"."session_key" FROM "django_session" '
+    'WHERE "django_session"."session_key" = %s\' - PARAMS = (u\'abc\',)',
+]
+
+
+def legacy_classify_query(sql):
+    if sql.startswith('QUERY ='):  # django 1.8
+        without_query_prefix = sql.split(' = ')[1]
+    else:
+        without_query_prefix = sql
+
+    first_token = without_query_prefix.split(' ')[0]
+    pattern = '\''
+    if pattern in first_token:
+        query_type_token = first_token.split(pattern)[1]
+    else:
+        query_type_token = first_token
+    return {
+        'SELECT': 'read',
+        'INSERT': 'write',
+        'UPDATE': 'write',
+        'DELETE': 'write',
+    }.get(query_type_token, 'other')
+
+
+def get_corpus(nr_of_queries):
+    # distinct strings, as for real queries, with a few shared beginnings
+    return [
+        '{} /* {} */'.format(SHAPES[i % len(SHAPES)], i)
+        for i in range(nr_of_queries)]
+
+
+def best_of(repeat, classify, corpus):
+    timings = []
+    for _ in range(repeat):
+        start = default_timer()
+        for sql in corpus:
+            classify(sql)
+        timings.append(default_timer() - start)
+    return min(timings)
+
+
+def main(nr_of_queries=50000, repeat=5):
+    corpus = get_corpus(nr_of_queries)
+    implementations = [
+        ('legacy', legacy_classify_query),
+        ('classify_query', classify_query),
+    ]
+    for (name, classify) in implementations:
+        elapsed = best_of(repeat, classify, corpus)
+        print('{:<16} {:>10.3f} us/query'.format(
+            name, elapsed / nr_of_queries * 1e6))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
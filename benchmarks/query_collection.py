@@ -0,0 +1,63 @@
+"""
+Compares the per query overhead of the QueryCollector's collection modes,
+i.e.: settings.DJPT_QUERY_COLLECTION
+
+    python benchmarks/query_collection.py [nr of queries]
+"""
+import sys
+from timeit import default_timer
+import django
+from django.conf import settings
+
+settings.configure(
+    DATABASES={'default': {
+        'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+    INSTALLED_APPS=['django_performance_testing'],
+)
+django.setup()
+
+from django.db import connection, reset_queries  # noqa: E402
+from django_performance_testing.queries import \
+    QueryCollector, DEBUG_CURSOR, EXECUTE_WRAPPER  # noqa: E402
+
+
+class NoCollector(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+def run_queries(nr_of_queries, collector):
+    reset_queries()
+    start = default_timer()
+    with collector:
+        for i in range(nr_of_queries):
+            # like the ORM does, a cursor per query
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT %s', [i])
+    return default_timer() - start
+
+
+def best_of(repeat, nr_of_queries, collector_factory):
+    return min(
+        run_queries(nr_of_queries, collector_factory())
+        for _ in range(repeat))
+
+
+def main(nr_of_queries=5000, repeat=5):
+    baseline = best_of(repeat, nr_of_queries, NoCollector)
+    print('{:<16} {:>10.2f} us/query'.format(
+        'no collector', baseline / nr_of_queries * 1e6))
+    for collection in [DEBUG_CURSOR, EXECUTE_WRAPPER]:
+        settings.DJPT_QUERY_COLLECTION = collection
+        elapsed = best_of(repeat, nr_of_queries, QueryCollector)
+        print('{:<16} {:>10.2f} us/query, overhead {:.2f} us/query'.format(
+            collection, elapsed / nr_of_queries * 1e6,
+            (elapsed - baseline) / nr_of_queries * 1e6))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
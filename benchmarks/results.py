@@ -0,0 +1,114 @@
+"""
+Measures the memory and the time it takes to create and compare (with the
+limits, and with each other) a run's worth of results, comparing the slotted
+result classes with the previous (functools.total_ordering, __dict__ based)
+ones
+
+    python benchmarks/results.py [nr of results]
+"""
+import functools
+import gc
+import sys
+from timeit import default_timer
+import django
+from django.conf import settings
+
+settings.configure(INSTALLED_APPS=['django_performance_testing'])
+django.setup()
+
+from django_performance_testing.core import NameValueResult  # noqa: E402
+from django_performance_testing.queries import \
+    QueryCountResult  # noqa: E402
+
+try:
+    import tracemalloc
+except ImportError:  # python 2
+    tracemalloc = None
+
+
+@functools.total_ordering
+class LegacyNameValueResult(object):
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+    def _to_cmp_val(self, other):
+        if type(other) == type(self):
+            return other.value
+        try:
+            x = bool(self.value == other)  # noqa: F841
+            return other
+        except TypeError:
+            raise NotImplementedError()
+
+    def __lt__(self, other):
+        return self.value < self._to_cmp_val(other)
+
+    def __eq__(self, other):
+        return self.value == self._to_cmp_val(other)
+
+
+class LegacyQueryCountResult(LegacyNameValueResult):
+
+    def __init__(self, queries, name):
+        self.queries = queries
+        super(LegacyQueryCountResult, self).__init__(
+            name=name, value=len(queries))
+
+
+QUERIES = [{'sql': 'SELECT 1', 'time': '0.001'}] * 3
+
+VARIANTS = [
+    ('legacy name/value', lambda i: LegacyNameValueResult(
+        name='total', value=i % 100)),
+    ('name/value', lambda i: NameValueResult(name='total', value=i % 100)),
+    ('legacy query count', lambda i: LegacyQueryCountResult(
+        name='total', queries=QUERIES)),
+    ('query count', lambda i: QueryCountResult(
+        name='total', queries=QUERIES)),
+    ('query count, value only', lambda i: QueryCountResult(
+        name='total', value=3)),
+]
+
+
+def measure_memory(create, nr_of_results):
+    if tracemalloc is None:
+        return None
+    gc.collect()
+    tracemalloc.start()
+    results = [create(i) for i in range(nr_of_results)]
+    (size, _) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return size
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = default_timer()
+        fn()
+        timings.append(default_timer() - start)
+    return min(timings)
+
+
+def main(nr_of_results=100000, repeat=5):
+    print('{} results'.format(nr_of_results))
+    print('{:>24} {:>10} {:>10} {:>10} {:>10}'.format(
+        '', 'memory', 'create', '<= limit', 'max()'))
+    for (name, create) in VARIANTS:
+        memory = measure_memory(create, nr_of_results)
+        created = best_of(
+            repeat, lambda: [create(i) for i in range(nr_of_results)])
+        results = [create(i) for i in range(nr_of_results)]
+        compared = best_of(
+            repeat, lambda: [result <= 50 for result in results])
+        maximum = best_of(repeat, lambda: max(results))
+        print('{:>24} {:>10} {:>7.1f} ms {:>7.1f} ms {:>7.1f} ms'.format(
+            name,
+            'n/a' if memory is None else '{:.1f} MB'.format(memory / 2.**20),
+            created * 1e3, compared * 1e3, maximum * 1e3))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
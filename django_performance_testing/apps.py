@@ -24,5 +24,11 @@ class DjangoPerformanceTestingAppConfig(AppConfig):
         integrate_into_django_test_runner()
         from .queries import setup_sending_before_clearing_queries_log_signal
         setup_sending_before_clearing_queries_log_signal()
+        from .queries import setup_execute_wrappers_backport
+        setup_execute_wrappers_backport()
         from .templates import integrate_into_django_templates
         integrate_into_django_templates()
+        from .caching import integrate_into_django_caches
+        integrate_into_django_caches()
+        from .instances import integrate_into_django_models
+        integrate_into_django_models()
@@ -0,0 +1,225 @@
+import functools
+import threading
+from django.conf import settings
+from django.core.cache.backends.base import BaseCache
+from django.utils.module_loading import import_string
+from django.utils.six.moves import cPickle as pickle
+from django_performance_testing.context import ScopeLocal
+from django_performance_testing.core import \
+    BaseCollector, BaseLimit, NameValueResult, get_connected_limits
+
+# the scopes being measured in the current thread (task), see record
+_active_collectors = ScopeLocal('djpt.caching.active_collectors', ())
+# the cache calls in progress, so only the outermost ones are recorded, e.g.:
+# LocMemCache.incr calls self.get
+_calls_in_progress = threading.local()
+_missing = object()
+
+# these are only wrapped when the backend implements them, otherwise the
+# BaseCache implementations call the wrapped basic operations below
+COMPOSITE_OPERATIONS = (
+    ('get_many', 'reads'),
+    ('has_key', 'reads'),
+    ('get_or_set', 'reads'),
+    ('set_many', 'writes'),
+    ('incr', 'writes'),
+    ('decr', 'writes'),
+    ('delete_many', 'deletes'),
+)
+BASIC_OPERATIONS = (
+    ('get', 'reads'),
+    ('set', 'writes'),
+    ('add', 'writes'),
+    ('delete', 'deletes'),
+    ('clear', 'deletes'),
+)
+
+
+def get_size(value):
+    try:
+        return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0  # not picklable, so not sent to the backend either
+
+
+def record(kind, hits=0, misses=0, values_read=(), values_written=()):
+    collectors = _active_collectors.get()
+    for collector in collectors:
+        counts = collector.counts
+        counts['calls'] += 1
+        counts[kind] += 1
+        counts['hits'] += hits
+        counts['misses'] += misses
+    # pickling the values again is only worth it for a limit on their size
+    sizing = [
+        collector for collector in collectors if collector.measures_bytes]
+    if not sizing or not (values_read or values_written):
+        return
+    bytes_read = sum(map(get_size, values_read))
+    bytes_written = sum(map(get_size, values_written))
+    for collector in sizing:
+        collector.counts['bytes_read'] += bytes_read
+        collector.counts['bytes_written'] += bytes_written
+
+
+def call_get(orig, cache_self, key, *a, **kw):
+    # asks for a marker as the default, so a stored value that equals the
+    # default is still a hit
+    if a:
+        default, a = a[0], a[1:]
+    else:
+        default = kw.pop('default', None)
+    value = orig(cache_self, key, _missing, *a, **kw)
+    if value is _missing:
+        record('reads', misses=1)
+        return default
+    record('reads', hits=1, values_read=(value,))
+    return value
+
+
+def call_get_many(orig, cache_self, keys, *a, **kw):
+    keys = list(keys)  # might be a generator
+    values = orig(cache_self, keys, *a, **kw)
+    record(
+        'reads', hits=len(values), misses=len(keys) - len(values),
+        values_read=values.values())
+    return values
+
+
+def call_has_key(orig, cache_self, *a, **kw):
+    has_key = orig(cache_self, *a, **kw)
+    record('reads', hits=int(bool(has_key)), misses=int(not has_key))
+    return has_key
+
+
+def call_set(orig, cache_self, key, value, *a, **kw):
+    retval = orig(cache_self, key, value, *a, **kw)
+    record('writes', values_written=(value,))
+    return retval
+
+
+def call_set_many(orig, cache_self, data, *a, **kw):
+    retval = orig(cache_self, data, *a, **kw)
+    record('writes', values_written=data.values())
+    return retval
+
+
+recording_calls = {
+    'get': call_get,
+    'get_many': call_get_many,
+    'has_key': call_has_key,
+    'set': call_set,
+    'add': call_set,
+    'set_many': call_set_many,
+}
+
+
+def wrap_operation(orig, name, kind):
+    """
+        records the outermost cache calls made while a CacheCollector is
+        active, and is a plain passthrough otherwise
+    """
+    recording_call = recording_calls.get(name)
+
+    @functools.wraps(orig)
+    def operation(cache_self, *a, **kw):
+        if not _active_collectors.get() or \
+                getattr(_calls_in_progress, 'depth', 0):
+            return orig(cache_self, *a, **kw)
+        _calls_in_progress.depth = 1
+        try:
+            if recording_call is not None:
+                return recording_call(orig, cache_self, *a, **kw)
+            retval = orig(cache_self, *a, **kw)
+            record(kind)
+            return retval
+        finally:
+            _calls_in_progress.depth = 0
+
+    operation.djpt_patched = True
+    return operation
+
+
+def is_implemented_by(backend_cls, name):
+    return any(
+        name in vars(cls) for cls in backend_cls.__mro__
+        if cls not in (BaseCache, object))
+
+
+def instrument_cache_backend(backend_cls):
+    operations = list(BASIC_OPERATIONS) + [
+        (name, kind) for (name, kind) in COMPOSITE_OPERATIONS
+        if is_implemented_by(backend_cls, name)]
+    for (name, kind) in operations:
+        orig = getattr(backend_cls, name, None)
+        if orig is None or hasattr(orig, 'djpt_patched'):
+            continue
+        orig = getattr(orig, '__func__', orig)  # unbound method on python 2
+        setattr(backend_cls, name, wrap_operation(orig, name, kind))
+
+
+def integrate_into_django_caches():
+    for config in settings.CACHES.values():
+        instrument_cache_backend(import_string(config['BACKEND']))
+
+
+class CacheCollector(BaseCollector):
+    """
+        Counts the cache operations of all the (settings.CACHES) cache
+        backends, made by the current thread (task) during the scope:
+
+        * calls: the number of operations, made of reads, writes and deletes
+        * hits/misses: of the keys read
+        * bytes_read/bytes_written: the pickled size of the values, only
+          measured when a limit is set for either of them, as it takes
+          pickling the values again
+    """
+
+    type_name = 'cache'
+
+    result_names = (
+        'calls', 'reads', 'writes', 'deletes', 'hits', 'misses',
+        'bytes_read', 'bytes_written')
+    bytes_result_names = ('bytes_read', 'bytes_written')
+
+    def __enter__(self):
+        self.measures_bytes = any(
+            name in limit.data
+            for limit in get_connected_limits(self)
+            for name in self.bytes_result_names)
+        self.counts = dict(
+            (name, 0) for name in self.result_names
+            if self.measures_bytes or name not in self.bytes_result_names)
+        _active_collectors.set(_active_collectors.get() + (self,))
+        return self
+
+    def before_exit(self):
+        _active_collectors.set(tuple(
+            collector for collector in _active_collectors.get()
+            if collector is not self))
+
+    def get_results_to_send(self):
+        return to_results(self.counts)
+
+    @classmethod
+    def get_sample_results(cls):
+        return [
+            to_results(dict(zip(cls.result_names, values)))
+            for values in [
+                (0, 0, 0, 0, 0, 0, 0, 0),
+                (3, 2, 1, 0, 1, 1, 120, 60),
+                (40, 30, 8, 2, 5, 25, 2048, 8192)]
+        ]
+
+
+def to_results(counts):
+    return [
+        NameValueResult(name=name, value=counts[name])
+        for name in CacheCollector.result_names if name in counts]
+
+
+class CacheLimit(BaseLimit):
+    collector_cls = CacheCollector
+
+    quantifier = 'many'
+    items_name = 'cache operations'
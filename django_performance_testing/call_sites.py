@@ -0,0 +1,45 @@
+import os
+import sys
+import django
+import django_performance_testing
+
+# frames from these are not where the application issued the query
+_skipped_dirs = tuple(
+    os.path.dirname(os.path.abspath(module.__file__)) + os.sep
+    for module in [django, django_performance_testing])
+_stdlib_dir = os.path.dirname(os.path.abspath(os.__file__)) + os.sep
+
+# filename -> displayed path, or None for the skipped files
+_displayed_paths = {}
+
+
+def get_displayed_path(filename):
+    try:
+        return _displayed_paths[filename]
+    except KeyError:
+        pass
+    path = os.path.abspath(filename)
+    if filename.startswith('<') or path.startswith(_skipped_dirs) or (
+            path.startswith(_stdlib_dir) and 'site-packages' not in path):
+        displayed = None
+    else:
+        displayed = os.path.relpath(path)
+    _displayed_paths[filename] = displayed
+    return displayed
+
+
+def get_call_site(depth=1):
+    """
+        the innermost application frame calling this, formatted as
+        'path:lineno in function'. Only the code objects are looked at while
+        walking the stack, and the decision is cached per file, so it's
+        cheap enough to be done for every executed query
+    """
+    frame = sys._getframe(depth)
+    while frame is not None:
+        code = frame.f_code
+        path = get_displayed_path(code.co_filename)
+        if path is not None:
+            return '{}:{} in {}'.format(path, frame.f_lineno, code.co_name)
+        frame = frame.f_back
+    return None
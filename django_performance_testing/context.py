@@ -1,28 +1,121 @@
+from django.utils import six
+import threading
+
+try:
+    import contextvars
+except ImportError:  # python < 3.7
+    contextvars = None
+
+
+class ScopeLocal(object):
+    """
+        A value of the current thread, and with contextvars (python 3.7+) of
+        the current asyncio task too, so the scopes of concurrent requests
+        or tests don't see each other. The values are replaced instead of
+        changed in place, as a new task starts with (and shares) the values
+        of the task that started it.
+    """
+
+    def __init__(self, name, default):
+        self.default = default
+        if contextvars is not None:
+            var = contextvars.ContextVar(name, default=default)
+            (self.get, self.set) = (var.get, var.set)
+        else:
+            self.local = threading.local()
+
+    def get(self):
+        return getattr(self.local, 'value', self.default)
+
+    def set(self, value):
+        self.local.value = value
+
+
+class FrozenList(list):
+    """ a list that can't be changed, so it can be shared instead of copied """
+
+    def _immutable(self, *a, **kw):
+        raise TypeError('{} is immutable'.format(type(self).__name__))
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+    append = extend = insert = pop = remove = reverse = sort = _immutable
+    if hasattr(list, 'clear'):
+        clear = _immutable
+    if hasattr(list, '__setslice__'):  # python 2
+        __setslice__ = __delslice__ = _immutable
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+
+class ContextSnapshot(dict):
+    """
+        An immutable copy of the context data, e.g.: {'test name': ['...']}.
+        A new one is only built when the context is entered or exited, and
+        it shares the lists of the keys not changed with the previous one,
+        so collectors and reports can keep a reference instead of a copy
+    """
+
+    def _immutable(self, *a, **kw):
+        raise TypeError('{} is immutable'.format(type(self).__name__))
+
+    __setitem__ = __delitem__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+    def replace(self, key, values):
+        """ a new snapshot with the values of key replaced """
+        items = dict(self)
+        if values:
+            items[key] = FrozenList(values)
+        else:
+            items.pop(key, None)
+        return ContextSnapshot(items)
+
+
 class Context(object):
+    """
+        The keys and values (e.g.: the test name, the requested url) the
+        results are collected in, see scoped_context. Each thread (task) has
+        its own, which starts out empty.
+    """
+
     def __init__(self):
-        self.data = {}
+        self._snapshot = ScopeLocal('djpt.context', ContextSnapshot())
+
+    @property
+    def snapshot(self):
+        return self._snapshot.get()
+
+    @property
+    def data(self):
+        return dict(
+            (key, list(values))
+            for (key, values) in six.iteritems(self.snapshot))
 
     def enter(self, key, value):
-        self.data.setdefault(key, [])
-        self.data[key].append(value)
+        snapshot = self.snapshot
+        self._snapshot.set(
+            snapshot.replace(key, list(snapshot.get(key, [])) + [value]))
 
     def exit(self, key, value):
-        if key not in self.data:
+        snapshot = self.snapshot
+        if key not in snapshot:
             raise ValueError(
                 'cannot exit not entered context - key {!r} mismatch'.format(
                     key
                 )
             )
-        values = self.data[key]
+        values = snapshot[key]
         enter_value = values[-1]
         if value != enter_value:
             raise ValueError(
                 'cannot exit not entered context - value mismatch '
                 '(exit: {!r}, enter: {!r})'.format(value, enter_value)
             )
-        del values[-1]
-        if not values:
-            self.data.pop(key)
+        self._snapshot.set(snapshot.replace(key, list(values)[:-1]))
 
 
 class scoped_context(object):
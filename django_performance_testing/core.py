@@ -1,21 +1,151 @@
-import copy
+from collections import OrderedDict
 from django.conf import settings
+from django.test.signals import setting_changed
+from django.utils import six
 from django_performance_testing import context
 from django_performance_testing.signals import results_collected
 import functools
 import pprint
+import sys
 import traceback
+import weakref
+
+
+class LimitsDispatcher(object):
+    """
+        Passes the results of a collector only to the limits listening to
+        it, instead of every limit receiving (and discarding) the results of
+        every collector. The limits are indexed by their collector class and
+        id, or for the anonymous ones, by their own collector. Only weak
+        references are kept, so a limit stops listening once it's deleted.
+    """
+
+    def __init__(self):
+        self.index = {}
+
+    def get_key(self, limit):
+        if limit.is_anonymous():
+            return id(limit.collector)
+        return (limit.collector_cls, limit.collector_id)
+
+    def add(self, limit):
+        key = self.get_key(limit)
+        limits = self.index.setdefault(key, OrderedDict())
+        limits[id(limit)] = weakref.ref(
+            limit, functools.partial(self.remove, key, id(limit)))
+
+    def discard(self, limit):
+        self.remove(self.get_key(limit), id(limit))
+
+    def remove(self, key, limit_id, ref=None):
+        limits = self.index.get(key)
+        if limits is None or limit_id not in limits:
+            return
+        if ref is not None and limits[limit_id] is not ref:
+            return  # the id is in use by a newer limit already
+        del limits[limit_id]
+        if not limits:
+            del self.index[key]
+
+    def get_limits(self, collector):
+        keys = [id(collector)]
+        id_ = getattr(collector, 'id_', None)
+        if id_ is not None:
+            keys.extend((cls, id_) for cls in type(collector).__mro__)
+        found = []
+        for key in keys:
+            try:
+                limits = self.index.get(key)
+            except TypeError:  # unhashable id
+                continue
+            if limits:
+                found.extend(ref() for ref in list(limits.values()))
+        return [limit for limit in found if limit is not None]
+
+    def results_collected_handler(self, signal, sender, **kwargs):
+        """
+            like results_collected.send_robust does for its receivers, all the
+            limits are called, and the first error is raised
+        """
+        first_error = None
+        for limit in self.get_limits(sender):
+            try:
+                limit.results_collected_handler(
+                    signal=signal, sender=sender, **kwargs)
+            except Exception:
+                if first_error is None:
+                    first_error = sys.exc_info()
+        if first_error is not None:
+            six.reraise(*first_error)
+
+
+limits_dispatcher = LimitsDispatcher()
+results_collected.connect(
+    limits_dispatcher.results_collected_handler, weak=False)
+
+
+def get_connected_limits(collector):
+    """
+        the limits that will check the results of the collector, e.g.: for
+        collectors that can check their limits before exiting
+    """
+    return limits_dispatcher.get_limits(collector)
+
+
+# (collector id, limit type name) -> the limit data in PERFORMANCE_LIMITS
+_settings_based_limits = None
+
+
+def get_settings_based_limits():
+    global _settings_based_limits
+    if _settings_based_limits is None:
+        performance_limits = getattr(settings, 'PERFORMANCE_LIMITS', {})
+        _settings_based_limits = dict(
+            ((collector_id, type_name), data)
+            for (collector_id, data_by_type_name) in six.iteritems(
+                performance_limits)
+            for (type_name, data) in six.iteritems(data_by_type_name))
+    return _settings_based_limits
+
+
+def reset_settings_based_limits(setting, **kwargs):
+    global _settings_based_limits
+    if setting == 'PERFORMANCE_LIMITS':
+        _settings_based_limits = None
+
+
+setting_changed.connect(reset_settings_based_limits)
+
+
+# compared as they are, without probing whether they compare with a value
+NUMERIC_TYPES = six.integer_types + (float,)
 
 
-@functools.total_ordering
 class NameValueResult(object):
+
+    # there can be hundreds of thousands of these in a datafile
+    __slots__ = ('name', 'value')
+
     def __init__(self, name, value):
         self.name = name
         self.value = value
 
+    def __getstate__(self):
+        # the pickle protocols of python 2 (0, 1) don't support __slots__
+        return dict(
+            (slot, getattr(self, slot))
+            for cls in type(self).__mro__
+            for slot in getattr(cls, '__slots__', ()))
+
+    def __setstate__(self, state):
+        for (slot, value) in six.iteritems(state):
+            setattr(self, slot, value)
+
     def _to_cmp_val(self, other):
-        if type(other) == type(self):
+        if isinstance(other, NameValueResult):
             return other.value
+        if type(other) in NUMERIC_TYPES:
+            return other
         try:
             # other is numeric
             # need it e.g.: to support _pytest.python.ApproxNonIterable
@@ -27,12 +157,39 @@ class NameValueResult(object):
     def __lt__(self, other):
         return self.value < self._to_cmp_val(other)
 
+    def __le__(self, other):
+        return self.value <= self._to_cmp_val(other)
+
+    def __gt__(self, other):
+        return self.value > self._to_cmp_val(other)
+
+    def __ge__(self, other):
+        return self.value >= self._to_cmp_val(other)
+
     def __eq__(self, other):
         return self.value == self._to_cmp_val(other)
 
+    def __ne__(self, other):
+        return not self == other
+
     def __str__(self):
         return str(self.value)
 
+    def get_details(self):
+        """ extra lines for the limit violation message """
+        return ''
+
+    def get_payload(self, encoder):
+        """
+            extra data to store in the datafile next to name and value,
+            see serializer.RecordEncoder.intern_all for repeated values
+        """
+        return None
+
+    @classmethod
+    def from_payload(cls, name, value, payload, decoder):
+        return cls(name=name, value=value)
+
 
 class LimitViolationError(RuntimeError):
 
@@ -43,16 +200,32 @@ class LimitViolationError(RuntimeError):
         self.tb = tb
         super(LimitViolationError, self).__init__(self.error_msg)
 
+    def __reduce__(self):
+        # e.g.: the parallel test runner sends errors between processes, but
+        # the limit can't be sent along, see LimitSummary
+        return (type(self), (
+            LimitSummary(self.limit_obj, self.result), self.result,
+            self.context, self.tb))
+
     @property
     def error_msg(self):
         base = self.base_error_msg
         ctx = self.context_repr
+        details = self.details
         tb = self.tb_msg
         if ctx:
             ctx = ' {}'.format(ctx)
+        if details:
+            details = '\n{}'.format(details)
         if tb:
             tb = '\n{}'.format(tb)
-        return ''.join([base, ctx, tb])
+        return ''.join([base, ctx, details, tb])
+
+    @property
+    def details(self):
+        if isinstance(self.result, NameValueResult):
+            return self.result.get_details()
+        return ''
 
     @property
     def tb_msg(self):
@@ -109,6 +282,26 @@ class LimitViolationError(RuntimeError):
             context=self.context, tb=orig_tb)
 
 
+class LimitSummary(object):
+    """
+        what the LimitViolationError needs of the violated limit, as plain
+        data, without the limit's collector and its state of the scope
+        (e.g.: generators, timer threads), which can't be pickled
+    """
+
+    def __init__(self, limit_obj, result):
+        self.quantifier = limit_obj.quantifier
+        self.items_name = limit_obj.items_name
+        self.collector_id = limit_obj.collector_id
+        self.limits = {result.name: limit_obj.limit_for(result)}
+
+    def is_anonymous(self):
+        return self.collector_id is None
+
+    def limit_for(self, result):
+        return self.limits.get(result.name)
+
+
 class BaseCollector(object):
 
     def __init__(self, id_=None):
@@ -121,7 +314,7 @@ class BaseCollector(object):
         self.before_exit()
         signal_responses = results_collected.send_robust(
             sender=self, results=self.get_results_to_send(),
-            context=copy.deepcopy(context.current.data))
+            context=context.current.snapshot)
         if exc_type is None:
             for (receiver, response) in signal_responses:
                 if isinstance(response,  BaseException):
@@ -153,6 +346,8 @@ class BaseLimit(object):
         self._data = data
         self.collector_id = collector_id
         self._validate_data()
+        if settings_based:
+            self._settings_key = (collector_id, self.type_name)
         if self.is_anonymous():
             self.collector = self.collector_cls()
         else:
@@ -174,9 +369,10 @@ class BaseLimit(object):
     def data(self):
         if not self.settings_based:
             return self._data
-        performance_limits = getattr(settings, 'PERFORMANCE_LIMITS', {})
-        settings_for_id = performance_limits.get(self.collector_id, {})
-        return settings_for_id.get(self.type_name, {})
+        limits = _settings_based_limits
+        if limits is None:
+            limits = get_settings_based_limits()
+        return limits.get(self._settings_key, {})
 
     @property
     def type_name(self):
@@ -189,12 +385,12 @@ class BaseLimit(object):
         return self
 
     def connect_for_results(self):
-        results_collected.connect(self.results_collected_handler)
+        limits_dispatcher.add(self)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.is_anonymous():
             self.collector.__exit__(exc_type, exc_val, exc_tb)
-            results_collected.disconnect(self.results_collected_handler)
+            limits_dispatcher.discard(self)
 
     def is_anonymous(self):
         return self.collector_id is None
@@ -202,16 +398,17 @@ class BaseLimit(object):
     def results_collected_handler(
             self, signal, sender, results, context, **kwargs):
         assert kwargs == {}, 'expected no kwargs, but got {!r}'.format(kwargs)
-        if not isinstance(sender, self.collector_cls):
+        if not self.listens_to(sender):
             return
-        if not self.is_anonymous():
-            if self.collector_id != sender.id_:
-                return
-        else:
-            if self.collector != sender:
-                return
         self.handle_results(results=results, context=context)
 
+    def listens_to(self, collector):
+        if not isinstance(collector, self.collector_cls):
+            return False
+        if not self.is_anonymous():
+            return self.collector_id == collector.id_
+        return self.collector == collector
+
     def handle_results(self, results, context):
         for result in results:
             self.handle_result(result, context)
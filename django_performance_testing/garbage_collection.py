@@ -0,0 +1,125 @@
+import gc
+import threading
+from django_performance_testing.core import \
+    BaseCollector, BaseLimit, NameValueResult
+from django_performance_testing.timing import wall_clock
+
+GENERATIONS = (0, 1, 2)
+
+# the scopes being measured (in any thread), see GCCallback
+_active_collectors = []
+_lock = threading.Lock()
+
+
+def can_collect():
+    return hasattr(gc, 'callbacks')  # python 3.3+
+
+
+class GCCallback(object):
+    """
+        a single gc.callbacks entry, only installed while any GCCollector is
+        active, that records every collection into all the active collectors
+    """
+
+    def __init__(self):
+        self.start = None
+
+    def __call__(self, phase, info):
+        if phase == 'start':
+            self.start = wall_clock()
+            return
+        if self.start is None:
+            return  # started before this got installed
+        pause = wall_clock() - self.start
+        self.start = None
+        for collector in list(_active_collectors):
+            collector.record(info['generation'], pause, info['collected'])
+
+    def install(self):
+        gc.callbacks.append(self)
+
+    def uninstall(self):
+        gc.callbacks.remove(self)
+        self.start = None
+
+
+_callback = GCCallback()
+
+
+class GCCollector(BaseCollector):
+    """
+        Reports the garbage collections that ran during the scope: their
+        number per generation, the seconds they paused the process, and the
+        objects they collected. As the collections are triggered by the
+        allocations of any thread, these are process wide.
+    """
+
+    type_name = 'gc'
+
+    def __enter__(self):
+        self.collections = dict((generation, 0) for generation in GENERATIONS)
+        self.pause = 0
+        self.max_pause = 0
+        self.collected = 0
+        if can_collect():
+            with _lock:
+                if not _active_collectors:
+                    _callback.install()
+                _active_collectors.append(self)
+        return self
+
+    def record(self, generation, pause, collected):
+        self.collections[generation] += 1
+        self.pause += pause
+        self.max_pause = max(self.max_pause, pause)
+        self.collected += collected
+
+    def before_exit(self):
+        with _lock:
+            if self in _active_collectors:
+                _active_collectors.remove(self)
+                if not _active_collectors:
+                    _callback.uninstall()
+
+    def get_results_to_send(self):
+        if not can_collect():
+            return []
+        return to_results(
+            collections=self.collections, pause=self.pause,
+            max_pause=self.max_pause, collected=self.collected)
+
+    @classmethod
+    def get_sample_results(cls):
+        return [
+            to_results(
+                collections=dict(zip(GENERATIONS, collections)),
+                pause=pause, max_pause=max_pause, collected=collected)
+            for (collections, pause, max_pause, collected) in [
+                ((0, 0, 0), 0, 0, 0),
+                ((12, 1, 0), 0.002, 0.0008, 150),
+                ((40, 3, 1), 0.120, 0.1, 52000)]
+        ]
+
+
+def to_results(collections, pause, max_pause, collected):
+    results = [
+        NameValueResult(
+            name='collections', value=sum(collections.values()))]
+    results.extend(
+        NameValueResult(
+            name='gen{}_collections'.format(generation),
+            value=collections[generation])
+        for generation in GENERATIONS)
+    results.extend([
+        NameValueResult(name='pause', value=pause),
+        NameValueResult(name='max_pause', value=max_pause),
+        NameValueResult(name='collected', value=collected),
+    ])
+    return results
+
+
+class GCLimit(BaseLimit):
+    collector_cls = GCCollector
+
+    quantifier = 'many'
+    items_name = 'garbage collection'
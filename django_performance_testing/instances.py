@@ -0,0 +1,117 @@
+from django.db.models import Model
+from django.db.models.signals import post_init
+from django_performance_testing.context import ScopeLocal
+from django_performance_testing.core import \
+    BaseCollector, BaseLimit, NameValueResult
+import threading
+
+# the scopes being measured in the current thread (task)
+_active_collectors = ScopeLocal('djpt.instances.active_collectors', ())
+# of all the threads, post_init is only connected while there are any
+_nr_of_active_collectors = 0
+_lock = threading.Lock()
+dispatch_uid = 'django_performance_testing.instances'
+
+
+def count_instance(sender, **kwargs):
+    for collector in _active_collectors.get():
+        counts = collector.instances_by_model
+        counts[sender] = counts.get(sender, 0) + 1
+
+
+def count_fetched():
+    for collector in _active_collectors.get():
+        collector.fetched += 1
+
+
+def integrate_into_django_models():
+    """ counts the instances loaded from the database, i.e.: the rows """
+    orig_from_db = Model.from_db.__func__
+    if hasattr(orig_from_db, 'djpt_patched'):
+        return
+
+    def from_db(cls, *a, **kw):
+        if _active_collectors.get():
+            count_fetched()
+        return orig_from_db(cls, *a, **kw)
+
+    from_db.djpt_patched = True
+    Model.from_db = classmethod(from_db)
+
+
+class InstancesCollector(BaseCollector):
+    """
+        Counts the model instances created during the scope, in total and
+        per model, and how many of them were loaded from the database
+        ('fetched'). E.g.: a single query can still load way too many rows.
+        Only the instances created by the current thread (task) are counted.
+    """
+
+    type_name = 'instances'
+
+    def __enter__(self):
+        global _nr_of_active_collectors
+        self.instances_by_model = {}
+        self.fetched = 0
+        with _lock:
+            if not _nr_of_active_collectors:
+                post_init.connect(
+                    count_instance, weak=False, dispatch_uid=dispatch_uid)
+            _nr_of_active_collectors += 1
+        _active_collectors.set(_active_collectors.get() + (self,))
+        return self
+
+    def before_exit(self):
+        global _nr_of_active_collectors
+        active = _active_collectors.get()
+        if self not in active:
+            return
+        _active_collectors.set(
+            tuple(collector for collector in active if collector is not self))
+        with _lock:
+            _nr_of_active_collectors -= 1
+            if not _nr_of_active_collectors:
+                post_init.disconnect(dispatch_uid=dispatch_uid)
+
+    def get_results_to_send(self):
+        counts = {}
+        for (model, count) in self.instances_by_model.items():
+            name = get_result_name(model)
+            counts[name] = counts.get(name, 0) + count
+        return to_results(counts, self.fetched)
+
+    @classmethod
+    def get_sample_results(cls):
+        return [
+            to_results(counts, fetched)
+            for (counts, fetched) in [
+                ({}, 0),
+                ({'model.auth.Group': 3}, 2),
+                ({'model.auth.Group': 12, 'model.auth.Permission': 480}, 490)]
+        ]
+
+
+def get_result_name(model):
+    if getattr(model, '_deferred', False):
+        # the deferred loading classes of Django < 1.10
+        model = model._meta.proxy_for_model
+    return 'model.{}.{}'.format(
+        model._meta.app_label, model._meta.object_name)
+
+
+def to_results(counts, fetched):
+    results = [
+        NameValueResult(name='total', value=sum(counts.values())),
+        NameValueResult(name='fetched', value=fetched),
+    ]
+    results.extend(
+        NameValueResult(name=name, value=count)
+        for (name, count) in sorted(counts.items()))
+    return results
+
+
+class InstancesLimit(BaseLimit):
+    collector_cls = InstancesCollector
+
+    quantifier = 'many'
+    items_name = 'model instances'
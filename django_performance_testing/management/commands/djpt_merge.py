@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django_performance_testing.serializer import \
+    get_datafile_path, merge_datafiles
+
+
+class Command(BaseCommand):
+    help = """
+    DJPT command to combine the datafiles of multiple test runs (e.g.: of
+    different CI nodes) into a single one
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'datafiles', nargs='+', help='the datafiles to combine')
+        parser.add_argument(
+            '-o', '--output', default=None,
+            help='the combined datafile, defaults to the DJPT datafile path')
+
+    def handle(self, *args, **kwargs):
+        datafiles = kwargs['datafiles']
+        output = kwargs.get('output') or get_datafile_path()
+        if os.path.abspath(output) in map(os.path.abspath, datafiles):
+            raise CommandError(
+                'Cannot merge into {!r}, as it is also an input'.format(
+                    output))
+        merge_datafiles(output, datafiles)
+        self.stdout.write('Merged {} datafiles into {}'.format(
+            len(datafiles), output))
@@ -10,9 +10,17 @@ class Command(BaseCommand):
     vailable collectors
     """
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'datafiles', nargs='*',
+            help='the datafiles to report on, defaults to the DJPT '
+                 'datafile path')
+
     def handle(self, *args, **kwargs):
         self.report = WorstReport()
-        datafile_path = get_datafile_path()
-        reader = Reader(datafile_path)
-        reader.read_all()
+        datafile_paths = kwargs.get('datafiles') or [get_datafile_path()]
+        for datafile_path in datafile_paths:
+            reader = Reader(datafile_path)
+            for _ in reader.iter_all():
+                pass  # the report is built from the results_read signals
         self.report.render(self.stdout)
@@ -0,0 +1,183 @@
+import os
+import threading
+from django_performance_testing.core import \
+    BaseCollector, BaseLimit, NameValueResult, get_connected_limits
+
+try:
+    import tracemalloc
+except ImportError:  # python 2
+    tracemalloc = None
+
+# the scopes being measured, outermost first, see MemoryCollector.track_peak
+_active_collectors = []
+# while tracing was started by a scope, it's kept on until none of the scopes
+# measuring with it (in any thread) is left
+_nr_of_scopes_tracing = 0
+_lock = threading.Lock()
+
+
+def can_reset_peak():
+    return hasattr(tracemalloc, 'reset_peak')  # python 3.9+
+
+
+class MemoryCollector(BaseCollector):
+    """
+        Measures the bytes allocated by python code through tracemalloc.
+
+        When tracemalloc is already tracing (e.g.: PYTHONTRACEMALLOC=1), every
+        scope is measured. Otherwise tracing is only started for the scopes
+        that have a memory limit set, as it slows down allocations. Without
+        tracemalloc (python 2), or when the peak of a scope can't be told
+        apart from the peak before it (python < 3.9, with tracing started
+        before the scope), the affected results are not sent. As taking a
+        snapshot of all the traces is costly, the top allocation sites are
+        only listed for the scopes that started tracing.
+    """
+
+    type_name = 'memory'
+
+    max_sites_in_details = 5
+
+    def __enter__(self):
+        global _nr_of_scopes_tracing
+        self.started_tracing = False
+        self.keeps_tracing = False
+        if tracemalloc is None:
+            self.measuring = False
+            return self
+        has_limits = any(
+            limit.data for limit in get_connected_limits(self))
+        with _lock:
+            self.measuring = tracemalloc.is_tracing() or has_limits
+            if not self.measuring:
+                return self
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+            self.keeps_tracing = \
+                self.started_tracing or _nr_of_scopes_tracing > 0
+            _nr_of_scopes_tracing += self.keeps_tracing
+            self.start, peak = tracemalloc.get_traced_memory()
+        self.track_peak(peak)
+        self.peak = self.start
+        if can_reset_peak():
+            tracemalloc.reset_peak()
+        _active_collectors.append(self)
+        return self
+
+    def track_peak(self, peak):
+        """
+            as the peak is reset by the nested scopes, the outer ones keep
+            the highest one seen so far
+        """
+        for collector in _active_collectors:
+            collector.peak = max(collector.peak, peak)
+
+    def before_exit(self):
+        global _nr_of_scopes_tracing
+        if not self.measuring:
+            return
+        if not tracemalloc.is_tracing():
+            # stopped by someone else, the scope can't be measured
+            _active_collectors.remove(self)
+            self.measuring = False
+            return
+        self.end, peak = tracemalloc.get_traced_memory()
+        self.track_peak(peak)
+        _active_collectors.remove(self)
+        self.sites = None
+        if self.started_tracing and self.is_over_limit():
+            self.sites = self.get_top_sites()
+        if self.keeps_tracing:
+            with _lock:
+                _nr_of_scopes_tracing -= 1
+                if not _nr_of_scopes_tracing:
+                    tracemalloc.stop()
+
+    def is_over_limit(self):
+        results = self.to_results(sites=None)
+        return any(
+            limit.limit_for(result) is not None and
+            result > limit.limit_for(result)
+            for limit in get_connected_limits(self)
+            for result in results)
+
+    def get_top_sites(self):
+        # all the traces are from within the scope, as it started tracing
+        stats = take_snapshot().statistics('lineno')
+        top = sorted(
+            (stat for stat in stats if stat.size > 0),
+            key=lambda stat: -stat.size)
+        return [
+            ('{}:{}'.format(
+                os.path.relpath(stat.traceback[0].filename),
+                stat.traceback[0].lineno),
+             stat.size)
+            for stat in top[:self.max_sites_in_details]]
+
+    def get_results_to_send(self):
+        if not self.measuring:
+            return []
+        return self.to_results(sites=self.sites)
+
+    def to_results(self, sites):
+        results = []
+        if self.started_tracing or can_reset_peak():
+            results.append(MemoryResult(
+                name='peak', value=self.peak - self.start, sites=sites))
+        results.append(MemoryResult(
+            name='net', value=self.end - self.start, sites=sites))
+        return results
+
+    @classmethod
+    def get_sample_results(cls):
+        return [
+            [MemoryResult(name='peak', value=peak),
+             MemoryResult(name='net', value=net)]
+            for (peak, net) in [(1024, 0), (4 * 2**20, 2**20), (2**30, 512)]
+        ]
+
+
+def take_snapshot():
+    snapshot = tracemalloc.take_snapshot()
+    return snapshot.filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+class MemoryResult(NameValueResult):
+    """ allocated bytes, with the top allocation sites when over the limit """
+
+    __slots__ = ('sites',)
+
+    def __init__(self, name, value, sites=None):
+        self.sites = sites
+        super(MemoryResult, self).__init__(name=name, value=value)
+
+    def get_payload(self, encoder):
+        if not self.sites:
+            return None
+        return [
+            (encoder.intern(site), size) for (site, size) in self.sites]
+
+    @classmethod
+    def from_payload(cls, name, value, payload, decoder):
+        sites = None
+        if payload:
+            sites = [
+                (decoder.values[site_ref], size)
+                for (site_ref, size) in payload]
+        return cls(name=name, value=value, sites=sites)
+
+    def get_details(self):
+        if not self.sites:
+            return ''
+        lines = [
+            '  {} bytes {}'.format(size, site) for (site, size) in self.sites]
+        return 'top allocation sites:\n{}'.format('\n'.join(lines))
+
+
+class MemoryLimit(BaseLimit):
+    collector_cls = MemoryCollector
+
+    quantifier = 'many'
+    items_name = 'allocated bytes'
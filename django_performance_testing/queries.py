@@ -1,67 +1,435 @@
+import functools
 import random
-from django.db import connection
+import re
+from contextlib import contextmanager
+from operator import itemgetter
+from timeit import default_timer
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.db.backends.utils import CursorWrapper
+from django.test.signals import setting_changed
 from django.utils import six
+from django_performance_testing import context as djpt_context
+from django_performance_testing.call_sites import get_call_site
 from django_performance_testing.signals import before_clearing_queries_log
 from django_performance_testing.core import \
-    BaseLimit, BaseCollector, NameValueResult
+    BaseLimit, BaseCollector, NameValueResult, get_connected_limits
 from django_performance_testing.utils import DelegatingProxy
 
 
+class SignalSendingBeforeClearingQueriesProxy(DelegatingProxy):
+
+    def __init__(self, wrapped, alias):
+        super(SignalSendingBeforeClearingQueriesProxy, self).__init__(wrapped)
+        self.__dict__['alias'] = alias
+
+    def clear(self):
+        before_clearing_queries_log.send(
+            sender=self.alias, queries=tuple(self))
+        self.wrapped.clear()
+
+
 def setup_sending_before_clearing_queries_log_signal():
-    class SignalSendingBeforeClearingQueriesProxy(DelegatingProxy):
-        def clear(self):
-            before_clearing_queries_log.send(sender=None, queries=tuple(self))
-            self.wrapped.clear()
+    for conn in connections.all():
+        if isinstance(
+                conn.queries_log, SignalSendingBeforeClearingQueriesProxy):
+            continue
+        conn.queries_log = SignalSendingBeforeClearingQueriesProxy(
+            conn.queries_log, conn.alias)
+
+
+DEBUG_CURSOR = 'debug_cursor'
+EXECUTE_WRAPPER = 'execute_wrapper'
+DEFAULT_DJPT_QUERY_COLLECTION = DEBUG_CURSOR
+
+
+def get_query_collection():
+    try:
+        return settings.DJPT_QUERY_COLLECTION
+    except AttributeError:
+        return DEFAULT_DJPT_QUERY_COLLECTION
+
+
+def get_query_breakdown():
+    """ any of 'tables' and 'models' """
+    return getattr(settings, 'DJPT_QUERY_BREAKDOWN', ())
+
+
+def get_query_call_sites_enabled():
+    return getattr(settings, 'DJPT_QUERY_CALL_SITES', False)
+
 
-    connection.queries_log = SignalSendingBeforeClearingQueriesProxy(
-        connection.queries_log)
+def setup_execute_wrappers_backport():
+    """
+        Django < 2.0 has no connection.execute_wrapper(), so wrap the cursor
+        methods to call the wrappers registered via execute_wrapper() below
+    """
+    if hasattr(CursorWrapper, '_execute_with_wrappers') or \
+            hasattr(CursorWrapper.execute, 'djpt_patched'):
+        return
+    orig_execute = CursorWrapper.execute
+    orig_executemany = CursorWrapper.executemany
 
+    def execute_with_wrappers(cursor, sql, params, many, executor):
+        wrappers = getattr(cursor.db, 'execute_wrappers', None)
+        if not wrappers:
+            return executor(cursor, sql, params)
 
-class QueryCountResult(NameValueResult):
+        def execute(sql, params, many, context):
+            return executor(cursor, sql, params)
 
-    def __init__(self, queries, name):
+        for wrapper in reversed(wrappers):
+            execute = functools.partial(wrapper, execute)
+        context = {'connection': cursor.db, 'cursor': cursor}
+        return execute(sql, params, many, context)
+
+    def execute(self, sql, params=None):
+        return execute_with_wrappers(self, sql, params, False, orig_execute)
+
+    def executemany(self, sql, param_list):
+        return execute_with_wrappers(
+            self, sql, param_list, True, orig_executemany)
+
+    execute.djpt_patched = executemany.djpt_patched = True
+    CursorWrapper.execute = execute
+    CursorWrapper.executemany = executemany
+
+
+def execute_wrapper(conn, wrapper):
+    if hasattr(conn, 'execute_wrapper'):
+        return conn.execute_wrapper(wrapper)
+    return _backported_execute_wrapper(conn, wrapper)
+
+
+@contextmanager
+def _backported_execute_wrapper(conn, wrapper):
+    wrappers = getattr(conn, 'execute_wrappers', None)
+    if wrappers is None:
+        wrappers = conn.execute_wrappers = []
+    wrappers.append(wrapper)
+    try:
+        yield
+    finally:
+        wrappers.pop()
+
+
+class QueriesResult(NameValueResult):
+    """
+        a result calculated from the queries, which are kept along, e.g.: for
+        the details of the limit violation message. Without the queries, it's
+        just the value
+    """
+
+    __slots__ = ('queries',)
+
+    def __init__(self, queries=None, name=None, value=None):
+        if name is None:
+            raise TypeError('{} needs a name'.format(type(self).__name__))
+        if queries is None and value is None:
+            raise TypeError(
+                '{} needs either the queries or the value'.format(
+                    type(self).__name__))
         self.queries = queries
-        super(QueryCountResult, self).__init__(
-            name=name, value=self.number_of_queries)
+        if value is None:
+            value = self.calculate_value()
+        super(QueriesResult, self).__init__(name=name, value=value)
+
+    def calculate_value(self):
+        raise NotImplementedError()
+
+    max_call_sites_in_details = 5
+
+    def get_payload(self, encoder):
+        if self.queries is None:
+            return None
+        sites = [query.get('site') for query in self.queries]
+        return (
+            encoder.intern_all(list(map(itemgetter('sql'), self.queries))),
+            list(map(itemgetter('time'), self.queries)),
+            encoder.intern_all(sites) if any(sites) else None,
+        )
+
+    @classmethod
+    def from_payload(cls, name, value, payload, decoder):
+        if payload is None:
+            return cls(name=name, value=value)
+        (sql_refs, times, site_refs) = payload
+        queries = SerializedQueries(decoder.values, sql_refs, times, site_refs)
+        return cls(name=name, queries=queries, value=value)
+
+    def get_details(self):
+        counts = {}
+        for query in self.queries or ():
+            site = query.get('site') if isinstance(query, dict) else None
+            if site is not None:
+                counts[site] = counts.get(site, 0) + 1
+        if not counts:
+            return ''
+        top = sorted(
+            six.iteritems(counts), key=lambda item: (-item[1], item[0]))
+        lines = [
+            '  {} {}'.format(count, site)
+            for (site, count) in top[:self.max_call_sites_in_details]]
+        return 'top call sites:\n{}'.format('\n'.join(lines))
+
+
+class QueryCountResult(QueriesResult):
+
+    __slots__ = ()
+
+    def calculate_value(self):
+        return len(self.queries)
 
     @property
     def number_of_queries(self):
-        return len(self.queries)
+        return self.value
+
+
+class QueryTimeResult(QueriesResult):
+    """ the seconds spent executing the queries """
+
+    __slots__ = ()
+
+    def calculate_value(self):
+        return round(sum(map(get_query_time, self.queries)), 6)
+
+
+def get_query_time(query):
+    return float(query['time'])
+
+
+class SerializedQueries(object):
+    """
+        the queries of a result read back from the datafile. Most reports
+        just need the value of the result, so the SQL texts are only looked
+        up (in the values of the decoder, which are never changed, only
+        extended) and turned into query dicts when accessed
+    """
+
+    def __init__(self, values, sql_refs, times, site_refs=None):
+        self.values = values
+        self.sql_refs = sql_refs
+        self.times = times
+        self.site_refs = site_refs
+        self._queries = None
+
+    @property
+    def queries(self):
+        if self._queries is None:
+            self._queries = [
+                {'sql': self.values[sql_ref], 'time': time}
+                for (sql_ref, time) in zip(self.sql_refs, self.times)]
+            if self.site_refs is not None:
+                for (query, site_ref) in zip(self._queries, self.site_refs):
+                    site = self.values[site_ref]
+                    if site is not None:
+                        query['site'] = site
+        return self._queries
+
+    def __len__(self):
+        return len(self.times)
+
+    def __iter__(self):
+        return iter(self.queries)
+
+    def __getitem__(self, index):
+        return self.queries[index]
+
+    def __eq__(self, other):
+        return self.queries == other
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class FailFastChecker(object):
+    """
+        checks the count limits of the fail_fast limits as each query
+        executes, so the query crossing the limit raises the
+        LimitViolationError, instead of the collector after all the queries
+    """
+
+    def __init__(self, limits, aliases):
+        self.limits = limits
+        self.has_multiple_aliases = len(aliases) > 1
+        self.limited_names = set()
+        for limit in limits:
+            self.limited_names.update(limit.data)
+        self.queries_by_name = {}
+        self.queries_by_fingerprint = {}
+
+    def query_executed(self, query, alias):
+        sql = query['sql']
+        tp = classify_query(sql)
+        names = ['total', tp]
+        if self.has_multiple_aliases:
+            names += ['{}.total'.format(alias), '{}.{}'.format(alias, tp)]
+        results = []
+        for name in names:
+            queries = self.queries_by_name.setdefault(name, [])
+            queries.append(query)
+            if name in self.limited_names:
+                results.append(QueryCountResult(name=name, queries=queries))
+        duplicates = self.queries_by_fingerprint.setdefault(
+            fingerprint_query(sql), [])
+        duplicates.append(query)
+        if 'duplicates' in self.limited_names:
+            results.append(
+                QueryCountResult(name='duplicates', queries=duplicates))
+        for limit in self.limits:
+            for result in results:
+                limit_value = limit.limit_for(result)
+                if limit_value is not None and result > limit_value:
+                    limit.handle_result(result, djpt_context.current.snapshot)
 
 
 class QueryCollector(BaseCollector):
 
     type_name = 'queries'
 
+    def __init__(self, id_=None):
+        super(QueryCollector, self).__init__(id_=id_)
+        self.queries_by_alias = {}
+
     def __enter__(self):
         self.queries = []
-        self.nr_of_queries_when_entering = len(connection.queries)
-        self.orig_force_debug_cursor = connection.force_debug_cursor
-        connection.force_debug_cursor = True
+        self.queries_by_alias = dict((alias, []) for alias in connections)
+        self.collection = get_query_collection()
+        self.call_sites = get_query_call_sites_enabled()
+        self.wrappers = []
+        fail_fast_limits = [
+            limit for limit in get_connected_limits(self)
+            if getattr(limit, 'fail_fast', False)]
+        if fail_fast_limits:
+            self.fail_fast = FailFastChecker(
+                fail_fast_limits, self.queries_by_alias)
+        else:
+            self.fail_fast = None
+        if self.collection == EXECUTE_WRAPPER:
+            # no debug cursor: neither formatting the executed SQL, nor
+            # logging it into (and slicing it from) connection.queries
+            self.enter_execute_wrappers(self.record_query)
+            return self
+        self.call_sites_by_alias = dict((alias, []) for alias in connections)
+        if self.fail_fast is not None or self.call_sites:
+            self.enter_execute_wrappers(self.note_query)
+        self.nr_of_queries_when_entering = {}
+        self.orig_force_debug_cursor = {}
+        # the connections are per thread, and so is the clearing of their
+        # queries log to be noticed, see queries_about_to_be_reset_handler
+        setup_sending_before_clearing_queries_log_signal()
+        self.connections = dict(
+            (conn.alias, conn) for conn in connections.all())
+        for conn in connections.all():
+            self.nr_of_queries_when_entering[conn.alias] = len(conn.queries)
+            self.orig_force_debug_cursor[conn.alias] = conn.force_debug_cursor
+            conn.force_debug_cursor = True
         before_clearing_queries_log.connect(
             self.queries_about_to_be_reset_handler)
         return self
 
     def queries_about_to_be_reset_handler(self,
                                           signal, sender, queries, **kwargs):
-        self.store_queries()
-        self.nr_of_queries_when_entering = 0
+        conn = self.connections.get(sender)
+        if conn is None or connections[sender] is not conn:
+            return  # the queries log of another thread is cleared
+        self.store_queries(conn)
+        self.nr_of_queries_when_entering[sender] = 0
+
+    def enter_execute_wrappers(self, wrapper_fn):
+        self.wrappers = [
+            execute_wrapper(conn, wrapper_fn) for conn in connections.all()]
+        for wrapper in self.wrappers:
+            wrapper.__enter__()
+
+    def record_query(self, execute, sql, params, many, context):
+        alias = context['connection'].alias
+        start = default_timer()
+        try:
+            result = execute(sql, params, many, context)
+        finally:
+            # more precise than the debug cursor's %.3f, as most queries
+            # take less than a millisecond, but add up to the db_time
+            query = {'sql': sql, 'time': '%.6f' % (default_timer() - start)}
+            if self.call_sites:
+                query['site'] = get_call_site()
+            self.queries.append(query)
+            self.queries_by_alias[alias].append(query)
+        if self.fail_fast is not None:
+            self.fail_fast.query_executed(query, alias)
+        return result
+
+    def note_query(self, execute, sql, params, many, context):
+        # the debug cursor logs the queries, this only adds their call sites
+        # (see store_queries) and checks the limits
+        alias = context['connection'].alias
+        if self.call_sites:
+            self.call_sites_by_alias[alias].append(get_call_site())
+        result = execute(sql, params, many, context)
+        if self.fail_fast is not None:
+            self.fail_fast.query_executed({'sql': sql}, alias)
+        return result
 
     def before_exit(self):
+        for wrapper in reversed(self.wrappers):
+            wrapper.__exit__(None, None, None)
+        if self.collection == EXECUTE_WRAPPER:
+            return
         before_clearing_queries_log.disconnect(
             self.queries_about_to_be_reset_handler)
-        connection.force_debug_cursor = self.orig_force_debug_cursor
-        self.store_queries()
+        for conn in connections.all():
+            conn.force_debug_cursor = self.orig_force_debug_cursor[conn.alias]
+            self.store_queries(conn)
 
     def get_results_to_send(self):
+        results = self.to_results(self.queries)
+        results.append(QueryCountResult(
+            name='duplicates', queries=get_duplicates(self.queries)))
+        if len(self.queries_by_alias) > 1:
+            # with multiple databases, there are results per alias too,
+            # e.g.: replica.read
+            for (alias, queries) in sorted(
+                    six.iteritems(self.queries_by_alias)):
+                results += self.to_results(
+                    queries, prefix='{}.'.format(alias))
+        breakdown = get_query_breakdown()
+        if 'tables' in breakdown or 'models' in breakdown:
+            results += self.to_breakdown_results(breakdown)
+        return results
+
+    def to_breakdown_results(self, breakdown):
+        by_table = {}
+        for query in self.queries:
+            for table in get_tables(query['sql']):
+                by_table.setdefault(table, []).append(query)
+        results = []
+        if 'tables' in breakdown:
+            results += [
+                QueryCountResult(name='table.{}'.format(table), queries=q)
+                for (table, q) in sorted(six.iteritems(by_table))]
+        if 'models' in breakdown:
+            models = get_models_by_table()
+            results += [
+                QueryCountResult(
+                    name='model.{}'.format(models[table]), queries=q)
+                for (table, q) in sorted(six.iteritems(by_table))
+                if table in models]
+        return results
+
+    def to_results(self, queries, prefix=''):
         by_type = dict(read=[], write=[], other=[])
-        for result in self.queries:
+        for result in queries:
             tp = classify_query(result['sql'])
-            by_type[tp].append(result)
-        by_type['total'] = self.queries
+            by_type.setdefault(tp, []).append(result)
+        by_type['total'] = queries
+        slowest = [max(queries, key=get_query_time)] if queries else []
         return list(
-            QueryCountResult(name=tp, queries=q)
-            for (tp, q) in six.iteritems(by_type))
+            QueryCountResult(name=prefix + tp, queries=q)
+            for (tp, q) in six.iteritems(by_type)) + [
+            QueryTimeResult(name=prefix + 'db_time', queries=queries),
+            QueryTimeResult(name=prefix + 'slowest_query', queries=slowest),
+        ]
 
     @classmethod
     def get_sample_results(cls):
@@ -79,43 +447,302 @@ class QueryCollector(BaseCollector):
             qc.queries = [to_query(sql) for sql in sqls]
             return qc.get_results_to_send()
 
+        def to_multi_db_result(**sqls_by_alias):
+            qc = cls()
+            qc.queries_by_alias = dict(
+                (alias, [to_query(sql) for sql in sqls])
+                for (alias, sqls) in six.iteritems(sqls_by_alias))
+            qc.queries = sum(qc.queries_by_alias.values(), [])
+            return qc.get_results_to_send()
+
         return [
             to_single_result(*sqls)
             for sqls in [
                 [read], [read, write], [read, read], [write, write],
                 [other, other], [read, write, other]
             ]
-        ]
+        ] + [to_multi_db_result(default=[write], replica=[read, read])]
+
+    def store_queries(self, conn):
+        queries = conn.queries[self.nr_of_queries_when_entering[conn.alias]:]
+        if self.call_sites:
+            # the debug cursor logged the queries in the order they ran
+            sites = self.call_sites_by_alias[conn.alias]
+            queries = with_call_sites(queries, sites[:len(queries)])
+            del sites[:len(queries)]
+        self.queries += queries
+        self.queries_by_alias[conn.alias] += queries
+
 
-    def store_queries(self):
-        self.queries += connection.queries[self.nr_of_queries_when_entering:]
+def with_call_sites(queries, sites):
+    """ copies, as the queries are the entries of connection.queries """
+    sites = sites + [None] * (len(queries) - len(sites))
+    return [
+        query if site is None else dict(query, site=site)
+        for (query, site) in zip(queries, sites)]
 
 
-_query_token_to_classification = {
+DEFAULT_QUERY_CLASSIFICATION = {
     'SELECT': 'read',
     'INSERT': 'write',
     'UPDATE': 'write',
     'DELETE': 'write',
+    'REPLACE': 'write',
+    'SAVEPOINT': 'other',
+    'RELEASE': 'other',
+    'ROLLBACK': 'other',
+    'BEGIN': 'other',
+    'COMMIT': 'other',
 }
 
+# the first keyword of the statement, skipping django 1.8's formatting of
+# the logged SQL, whitespace, comments and opening parentheses
+_statement_keyword = re.compile(r"""
+    (?:\s*QUERY\s*[=-]\s*u?['"])?
+    (?:\s|\(|/\*.*?\*/|--[^\n]*)*
+    ([a-zA-Z]+)
+""", re.VERBOSE | re.DOTALL)
+
+# the tokens of a WITH statement that matter for finding its main statement
+_cte_token = re.compile(r"""
+    '(?:[^']|'')*'|"[^"]*"|/\*.*?\*/|--[^\n]*|[()]|[a-zA-Z_]\w*
+""", re.VERBOSE | re.DOTALL)
+
+CLASSIFICATION_PREFIX_LENGTH = 32
+MAX_CACHED_CLASSIFICATIONS = 4096
+_classification_cache = {}
+_classifications = None
+
+
+def get_query_classifications():
+    """
+        the keyword to classification mapping, where
+        settings.DJPT_QUERY_CLASSIFICATION can add to or override the
+        defaults, e.g.: {'MERGE': 'write', 'CALL': 'write'}
+    """
+    global _classifications
+    if _classifications is None:
+        classifications = dict(DEFAULT_QUERY_CLASSIFICATION)
+        classifications.update(
+            (keyword.upper(), classification)
+            for (keyword, classification) in six.iteritems(
+                getattr(settings, 'DJPT_QUERY_CLASSIFICATION', {})))
+        _classifications = classifications
+    return _classifications
+
+
+def reset_query_classification_cache(setting, **kwargs):
+    global _classifications
+    if setting == 'DJPT_QUERY_CLASSIFICATION':
+        _classifications = None
+        _classification_cache.clear()
+
+
+setting_changed.connect(reset_query_classification_cache)
+
 
 def classify_query(sql):
-    if sql.startswith('QUERY ='):  # django 1.8
-        without_query_prefix = sql.split(' = ')[1]
-    else:
-        without_query_prefix = sql
+    """
+        Most statements are classified by their first keyword, so their
+        classification is cached by the beginning of the SQL, which is
+        usually shared by all the queries of the same code path.
+    """
+    key = sql[:CLASSIFICATION_PREFIX_LENGTH]
+    classification = _classification_cache.get(key)
+    if classification is not None:
+        return classification
+    classification, is_decided_by_key = _classify(sql, len(key))
+    if is_decided_by_key:
+        if len(_classification_cache) >= MAX_CACHED_CLASSIFICATIONS:
+            _classification_cache.clear()
+        _classification_cache[key] = classification
+    return classification
 
-    first_token = without_query_prefix.split(' ')[0]
-    pattern = '\''
-    if pattern in first_token:
-        query_type_token = first_token.split(pattern)[1]
-    else:
-        query_type_token = first_token
-    return _query_token_to_classification.get(query_type_token, 'other')
+
+def _classify(sql, key_length):
+    classifications = get_query_classifications()
+    match = _statement_keyword.match(sql)
+    if match is None:
+        return 'other', False
+    keyword = match.group(1).upper()
+    if keyword == 'WITH':
+        return _classify_cte(sql, match.end(), classifications), False
+    # the keyword could continue after the key, e.g.: SELECTED
+    is_decided_by_key = match.end() < key_length or match.end() == len(sql)
+    return classifications.get(keyword, 'other'), is_decided_by_key
+
+
+def _classify_cte(sql, pos, classifications):
+    # WITH name AS (...), ... <main statement>
+    depth = 0
+    for match in _cte_token.finditer(sql, pos):
+        token = match.group()
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif depth == 0 and token.upper() in classifications:
+            return classifications[token.upper()]
+    return 'other'
+
+
+# string and number literals, and placeholders, while keeping the quoted
+# identifiers as they are, e.g.: "s1_x2" (savepoint) or "table2"
+_fingerprint_literal = re.compile(r"""
+    ("(?:[^"]|"")*")|'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s
+""", re.VERBOSE)
+_fingerprint_list = re.compile(
+    r'\( ?\?(?: ?, ?\?)* ?\)(?: ?, ?\( ?\?(?: ?, ?\?)* ?\))*')
+_fingerprint_query_params = re.compile(
+    r"""^QUERY = u?(['"])(.*)\1 - PARAMS = .*$""", re.DOTALL)
+
+MAX_CACHED_FINGERPRINTS = 4096
+# longer statements (e.g.: the logged SQL of a bulk_create, with the values)
+# rarely repeat, and would be kept alive by the cache
+MAX_CACHED_FINGERPRINT_SQL_LENGTH = 1024
+_fingerprint_cache = {}
+
+
+def _keep_identifier(match):
+    return match.group(1) or '?'
+
+
+def fingerprint_query(sql):
+    """
+        the shape of the statement, that is the same for all the queries
+        that differ only in their parameters, e.g.: the queries of an N+1
+        problem. Literals become ?, and lists of them (e.g.: IN (...) or
+        multi-row VALUES) become (...)
+    """
+    cached = len(sql) <= MAX_CACHED_FINGERPRINT_SQL_LENGTH
+    fingerprint = _fingerprint_cache.get(sql) if cached else None
+    if fingerprint is not None:
+        return fingerprint
+    without_params = _fingerprint_query_params.sub(r'\2', sql)  # django 1.8
+    fingerprint = ' '.join(
+        _fingerprint_literal.sub(_keep_identifier, without_params).split())
+    fingerprint = _fingerprint_list.sub('(...)', fingerprint)
+    if not cached:
+        return fingerprint
+    if len(_fingerprint_cache) >= MAX_CACHED_FINGERPRINTS:
+        _fingerprint_cache.clear()
+    _fingerprint_cache[sql] = fingerprint
+    return fingerprint
+
+
+def get_duplicates(queries):
+    """ the queries of the most often repeated fingerprint """
+    by_fingerprint = {}
+    for query in queries:
+        by_fingerprint.setdefault(
+            fingerprint_query(query['sql']), []).append(query)
+    if not by_fingerprint:
+        return []
+    return max(six.itervalues(by_fingerprint), key=len)
+
+
+# the tokens of a statement that matter for finding the tables it references
+_table_token = re.compile(r"""
+    "[^"]+"|`[^`]+`|[a-zA-Z_]\w*|[(),.]
+""", re.VERBOSE)
+_punctuation = frozenset('(),.')
+
+MAX_CACHED_TABLES = 4096
+_tables_cache = {}
+_models_by_table = None
+
+
+def get_tables(sql):
+    """
+        the names of the tables the statement references. The fingerprint
+        is looked at, so that string literals don't get in the way, and
+        the queries differing only in their parameters share the cache
+    """
+    fingerprint = fingerprint_query(sql)
+    tables = _tables_cache.get(fingerprint)
+    if tables is not None:
+        return tables
+    tables = tuple(sorted(_find_tables(_table_token.findall(fingerprint))))
+    if len(_tables_cache) >= MAX_CACHED_TABLES:
+        _tables_cache.clear()
+    _tables_cache[fingerprint] = tables
+    return tables
+
+
+def _find_tables(tokens):
+    """
+        the tables after FROM (incl. comma separated ones), JOIN, INTO and
+        UPDATE. Only a FROM in a statement counts, i.e.: not the one in e.g.:
+        EXTRACT(YEAR FROM "created"), or IS DISTINCT FROM, or FOR UPDATE
+    """
+    tables = set()
+    # per parenthesis level, whether it's a (sub)statement, or e.g.: a call
+    in_statement = [True]
+    previous = None
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        keyword = token.upper()
+        i += 1
+        if token == '(':
+            in_statement.append(False)
+        elif token == ')':
+            if len(in_statement) > 1:
+                in_statement.pop()
+        elif keyword in ('SELECT', 'DELETE'):
+            in_statement[-1] = True
+        elif keyword == 'FROM' and in_statement[-1] and previous != 'DISTINCT':
+            i = _read_tables(tokens, i, tables, comma_separated=True)
+        elif keyword in ('JOIN', 'INTO') or \
+                (keyword == 'UPDATE' and previous != 'FOR'):
+            i = _read_tables(tokens, i, tables, comma_separated=False)
+        previous = keyword
+    return tables
+
+
+def _read_tables(tokens, i, tables, comma_separated):
+    """ adds the table(s) starting at tokens[i], returns the index after """
+    while i < len(tokens) and tokens[i] not in _punctuation:
+        name = tokens[i]
+        i += 1
+        while i + 1 < len(tokens) and tokens[i] == '.':  # schema qualified
+            name = tokens[i + 1]
+            i += 2
+        tables.add(name.strip('"`'))
+        if not comma_separated:
+            break
+        # skipping the alias, if there's another table after it
+        j = i + 1 if i < len(tokens) and tokens[i].upper() == 'AS' else i
+        if j + 1 < len(tokens) and tokens[j + 1] == ',' and \
+                tokens[j] not in _punctuation:
+            j += 1
+        if j >= len(tokens) or tokens[j] != ',':
+            break
+        i = j + 1
+    return i
+
+
+def get_models_by_table():
+    """ db_table -> app_label.ModelName, including m2m through tables """
+    global _models_by_table
+    if _models_by_table is None:
+        _models_by_table = dict(
+            (model._meta.db_table, '{}.{}'.format(
+                model._meta.app_label, model._meta.object_name))
+            for model in apps.get_models(include_auto_created=True))
+    return _models_by_table
 
 
 class QueryBatchLimit(BaseLimit):
     collector_cls = QueryCollector
 
+    @property
+    def fail_fast(self):
+        """
+            when set (e.g.: QueryBatchLimit(total=10, fail_fast=True)), the
+            query counts are checked as each query executes
+        """
+        return self.data.get('fail_fast', False)
+
     quantifier = 'many'
     items_name = 'queries'
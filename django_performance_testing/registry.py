@@ -31,6 +31,11 @@ class SettingsOrDefaultBasedRegistry(UniqueNamedClassRegistry):
     defaults = (
         'django_performance_testing.queries.QueryBatchLimit',
         'django_performance_testing.timing.TimeLimit',
+        'django_performance_testing.memory.MemoryLimit',
+        'django_performance_testing.resources.ResourceLimit',
+        'django_performance_testing.garbage_collection.GCLimit',
+        'django_performance_testing.caching.CacheLimit',
+        'django_performance_testing.instances.InstancesLimit',
     )
 
     def __init__(self):
@@ -1,5 +1,6 @@
 import copy
 from django.utils import six
+from django_performance_testing.context import ContextSnapshot
 from django_performance_testing.signals import results_read
 import pprint
 
@@ -13,6 +14,13 @@ class Result(object):
         return '{} {}'.format(self.value, pprint.pformat(self.context))
 
 
+def to_kept(context):
+    """ the snapshots can't change, while any other context might """
+    if isinstance(context, ContextSnapshot):
+        return context
+    return copy.deepcopy(context)
+
+
 class WorstReport(object):
 
     def __init__(self):
@@ -34,8 +42,7 @@ class WorstReport(object):
             d = get_data(sender.id_, sender.type_name)
             current = d.get(name, None)
             if current is None or current.value < result:
-                # TODO: once serialization, no need to deepcopy
-                d[name] = Result(value=result, context=copy.deepcopy(context))
+                d[name] = Result(value=result, context=to_kept(context))
 
         for name, result in name_value_pairs:
             handle_result(name, result)
@@ -0,0 +1,108 @@
+import os
+import sys
+from django_performance_testing.core import \
+    BaseCollector, BaseLimit, NameValueResult, get_connected_limits
+
+try:
+    import resource
+except ImportError:  # e.g.: windows
+    resource = None
+
+# ru_maxrss is in kilobytes on linux, but in bytes on macOS
+MAXRSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+STATM_PATH = '/proc/self/statm'
+try:
+    PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError):
+    PAGE_SIZE = None
+
+# result name -> the getrusage field its delta is calculated from
+RUSAGE_FIELDS = (
+    ('minor_faults', 'ru_minflt'),
+    ('major_faults', 'ru_majflt'),
+    ('voluntary_switches', 'ru_nvcsw'),
+    ('involuntary_switches', 'ru_nivcsw'),
+    ('block_reads', 'ru_inblock'),
+    ('block_writes', 'ru_oublock'),
+)
+
+
+def get_rusage():
+    return resource.getrusage(resource.RUSAGE_SELF)
+
+
+def get_rss():
+    """ the current resident set size in bytes, or None if not available """
+    if PAGE_SIZE is None:
+        return None
+    try:
+        with open(STATM_PATH) as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (IOError, OSError, IndexError, ValueError):
+        return None
+
+
+class ResourceCollector(BaseCollector):
+    """
+        Reports the change in the resource usage of the process during the
+        scope, based on getrusage and, where available (linux), the current
+        resident set size from /proc/self/statm:
+
+        * max_rss: the growth of the peak resident set size, in bytes
+        * rss: the change of the resident set size, in bytes, only measured
+          when a limit is set for it, as it's read from a file
+        * minor_faults/major_faults: page faults without/with I/O
+        * voluntary_switches/involuntary_switches: context switches due to
+          waiting (e.g.: for I/O) or to preemption
+        * block_reads/block_writes: block I/O operations of the filesystem
+
+        As these are process wide, other threads are counted too.
+    """
+
+    type_name = 'resources'
+
+    def __enter__(self):
+        if resource is None:
+            return self
+        self.measures_rss = any(
+            'rss' in limit.data for limit in get_connected_limits(self))
+        self.start_rusage = get_rusage()
+        self.start_rss = get_rss() if self.measures_rss else None
+        return self
+
+    def get_results_to_send(self):
+        if resource is None:
+            return []
+        end_rusage = get_rusage()
+        end_rss = get_rss() if self.measures_rss else None
+        results = [
+            NameValueResult(name='max_rss', value=MAXRSS_UNIT * (
+                end_rusage.ru_maxrss - self.start_rusage.ru_maxrss))]
+        if end_rss is not None and self.start_rss is not None:
+            results.append(
+                NameValueResult(name='rss', value=end_rss - self.start_rss))
+        results.extend(
+            NameValueResult(
+                name=name,
+                value=getattr(end_rusage, field) - getattr(
+                    self.start_rusage, field))
+            for (name, field) in RUSAGE_FIELDS)
+        return results
+
+    @classmethod
+    def get_sample_results(cls):
+        return [
+            [NameValueResult(name='max_rss', value=max_rss),
+             NameValueResult(name='rss', value=rss),
+             NameValueResult(name='major_faults', value=major_faults),
+             NameValueResult(name='voluntary_switches', value=switches)]
+            for (max_rss, rss, major_faults, switches) in [
+                (0, 4096, 0, 2), (2**20, -4096, 3, 40), (2**28, 2**27, 0, 7)]
+        ]
+
+
+class ResourceLimit(BaseLimit):
+    collector_cls = ResourceCollector
+
+    quantifier = 'many'
+    items_name = 'resource usage'
@@ -1,8 +1,21 @@
+from collections import namedtuple
+import os
+import struct
 from django.conf import settings
+from django.utils import six
+from django.utils.module_loading import import_string
 from django.utils.six.moves import cPickle as pickle
+from django_performance_testing.context import ContextSnapshot, FrozenList
+from django_performance_testing.core import NameValueResult
 from django_performance_testing.signals import results_collected, results_read
 
 DEFAULT_DJPT_DATAFILE_PATH = 'djpt.results_collected'
+DEFAULT_DJPT_DATAFILE_BATCH_SIZE = 100
+
+FORMAT_MAGIC = b'DJPT'
+FORMAT_VERSION = 2
+HEADER = FORMAT_MAGIC + struct.pack('>B', FORMAT_VERSION)
+frame_length = struct.Struct('>I')
 
 
 def get_datafile_path():
@@ -12,38 +25,318 @@ def get_datafile_path():
         return DEFAULT_DJPT_DATAFILE_PATH
 
 
+def get_datafile_batch_size():
+    try:
+        return settings.DJPT_DATAFILE_BATCH_SIZE
+    except AttributeError:
+        return DEFAULT_DJPT_DATAFILE_BATCH_SIZE
+
+
+def to_frame(record):
+    payload = pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+    return frame_length.pack(len(payload)) + payload
+
+
+def read_frames(f):
+    """
+        yields the payload of each frame, and stops silently at a truncated
+        trailing frame, e.g.: when the writing process was killed mid-write
+    """
+    while True:
+        prefix = f.read(frame_length.size)
+        if len(prefix) < frame_length.size:
+            return
+        (length,) = frame_length.unpack(prefix)
+        payload = f.read(length)
+        if len(payload) < length:
+            return
+        yield payload
+
+
+def copy_frames(src, dst):
+    for payload in read_frames(src):
+        dst.write(frame_length.pack(len(payload)) + payload)
+
+
+class SenderRecord(namedtuple('SenderRecord', ('id_', 'type_name'))):
+    """ stands in for the collector that sent the results read back """
+
+
+class RecordEncoder(object):
+    """
+        Turns a (sender, results, context) record into a compact, picklable
+        tuple:
+
+            (reset, definitions, id_ref, type_name_ref, results, context_ref)
+
+        Repeated values (collector ids, result names, contexts, result
+        classes, SQL texts) are stored once, and later referenced by their
+        index in the table built from the definitions of the preceding
+        records. As each file starts with a reset, datafiles can be
+        concatenated frame by frame.
+    """
+
+    max_interned = 10000
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.refs = {}
+        self.needs_reset = True
+
+    def intern(self, value):
+        ref = self.refs.get(value)
+        if ref is None:
+            ref = self.refs[value] = len(self.refs)
+            if isinstance(value, type):
+                # result classes are stored by their dotted path
+                value = '{}.{}'.format(value.__module__, value.__name__)
+            self.definitions.append(value)
+        return ref
+
+    def intern_all(self, values):
+        refs = list(map(self.refs.get, values))
+        if None in refs:
+            refs = [
+                self.intern(value) if ref is None else ref
+                for (ref, value) in zip(refs, values)]
+        return refs
+
+    def encode(self, sender, results, context):
+        if len(self.refs) >= self.max_interned:
+            self.reset()
+        self.definitions = []
+        record = (
+            self.needs_reset,
+            self.definitions,
+            self.intern(sender.id_),
+            self.intern(sender.type_name),
+            [self.encode_result(result) for result in results],
+            self.encode_context(context),
+        )
+        self.needs_reset = False
+        return record
+
+    def encode_result(self, result):
+        if not isinstance(result, NameValueResult):
+            return (result,)
+        return (
+            self.intern(type(result)),
+            self.intern(result.name),
+            result.value,
+            result.get_payload(self),
+        )
+
+    def encode_context(self, context):
+        try:
+            return self.intern(tuple(
+                (key, tuple(values) if isinstance(values, list) else values)
+                for (key, values) in sorted(six.iteritems(context))))
+        except (TypeError, AttributeError):
+            return context  # not hashable, store it as is
+
+
+class RecordDecoder(object):
+
+    def __init__(self):
+        self.values = []
+        self.contexts = {}
+        self.result_classes = {}
+
+    def decode(self, record):
+        (reset, definitions, id_ref, type_name_ref,
+            results, context_ref) = record
+        if reset:
+            self.values = []
+            self.contexts = {}
+        self.values.extend(definitions)
+        sender = SenderRecord(
+            id_=self.values[id_ref], type_name=self.values[type_name_ref])
+        return (
+            sender,
+            [self.decode_result(result) for result in results],
+            self.decode_context(context_ref),
+        )
+
+    def decode_result(self, encoded):
+        if len(encoded) == 1:
+            return encoded[0]
+        (cls_ref, name_ref, value, payload) = encoded
+        cls = self.get_result_class(self.values[cls_ref])
+        return cls.from_payload(
+            name=self.values[name_ref], value=value, payload=payload,
+            decoder=self)
+
+    def lookup_all(self, refs):
+        return list(map(self.values.__getitem__, refs))
+
+    def get_result_class(self, dotted_path):
+        if dotted_path not in self.result_classes:
+            try:
+                cls = import_string(dotted_path)
+            except ImportError:
+                # e.g.: a result class defined locally, keep name and value
+                cls = NameValueResult
+            self.result_classes[dotted_path] = cls
+        return self.result_classes[dotted_path]
+
+    def decode_context(self, context_ref):
+        """ the records sharing a context share its (immutable) snapshot """
+        if not isinstance(context_ref, int):
+            return context_ref
+        if context_ref not in self.contexts:
+            self.contexts[context_ref] = ContextSnapshot(
+                (key, FrozenList(values) if isinstance(values, tuple)
+                    else values)
+                for (key, values) in self.values[context_ref])
+        return self.contexts[context_ref]
+
+
 class Reader:
     def __init__(self, fpath):
         self.fpath = fpath
 
     def read_all(self):
+        return list(self.iter_all())
+
+    def iter_all(self):
+        """
+            decodes the records one at a time, firing results_read for each,
+            so consumers can process datafiles of any size in constant memory
+        """
         with open(self.fpath, 'rb') as f:
-            data = f.read()
-        if not data:
-            return []
-        deserialized = pickle.loads(data)
-        for (sender, results, context) in deserialized:
-            results_read.send(sender=sender, results=results, context=context)
-        return deserialized
+            for (sender, results, context) in self.deserialize(f):
+                results_read.send(
+                    sender=sender, results=results, context=context)
+                yield (sender, results, context)
+
+    def deserialize(self, f):
+        header = f.read(len(HEADER))
+        if not header:
+            return iter([])
+        if not header.startswith(FORMAT_MAGIC):
+            # written before the framed format was introduced
+            return iter(pickle.loads(header + f.read()))
+        if header != HEADER:
+            raise ValueError(
+                'Unsupported datafile format version in {!r}'.format(
+                    self.fpath))
+        decoder = RecordDecoder()
+        return (
+            decoder.decode(pickle.loads(payload))
+            for payload in read_frames(f))
 
 
 class Writer:
-    def __init__(self, fpath):
+    """
+        Unless a batch_size is given, the collected results are kept in memory
+        and only written when end() is called. With a batch_size, each record
+        is framed and the file is flushed every batch_size records, so memory
+        use is bounded and a killed run still leaves a readable file.
+
+        Results collected in forked worker processes (e.g.: by
+        manage.py test --parallel) are written into a shard file per worker,
+        and merged into the datafile on end().
+    """
+
+    def __init__(self, fpath, batch_size=None):
         self.fpath = fpath
+        self.batch_size = batch_size
+        self.stream = None
 
     def start(self):
         self.data = []
+        self.encoder = RecordEncoder()
+        self.pid = os.getpid()
+        for shard_path in self.shard_paths():
+            os.remove(shard_path)  # left behind by an interrupted run
+        if self.batch_size:
+            self.stream = self.open_stream(self.fpath)
         results_collected.connect(self.handle_results_collected)
 
     def end(self):
         results_collected.disconnect(self.handle_results_collected)
-        data = pickle.dumps(self.data, pickle.HIGHEST_PROTOCOL)
+        if self.batch_size:
+            if self.stream is not None:
+                self.flush()
+                self.merge_shards(self.stream)
+                self.stream.close()
+                self.stream = None
+            return
         # TODO: couldn't write a test to verify file is opened only here
         with open(self.fpath, 'wb') as f:
-            f.write(data)
+            f.write(HEADER)
+            self.write_frames(f)
+            self.merge_shards(f)
+
+    def open_stream(self, fpath):
+        stream = open(fpath, 'wb')
+        stream.write(HEADER)
+        stream.flush()
+        return stream
+
+    def flush(self):
+        self.write_frames(self.stream)
+        self.stream.flush()
+        self.data = []
+
+    def write_frames(self, f):
+        f.write(b''.join(self.data))
+
+    def shard_paths(self):
+        dirname, basename = os.path.split(os.path.abspath(self.fpath))
+        prefix = '{}.shard-'.format(basename)
+        return sorted(
+            os.path.join(dirname, name) for name in os.listdir(dirname)
+            if name.startswith(prefix))
+
+    def start_shard(self):
+        # the records buffered so far belong to, and are written by, the
+        # parent process. Workers can be terminated any time, so each of
+        # their records is flushed right away
+        self.pid = os.getpid()
+        self.data = []
+        self.encoder = RecordEncoder()
+        self.batch_size = 1
+        self.stream = self.open_stream(
+            '{}.shard-{}'.format(self.fpath, self.pid))
+
+    def merge_shards(self, f):
+        for shard_path in self.shard_paths():
+            append_datafile(f, shard_path)
+            os.remove(shard_path)
 
     def handle_results_collected(self, sender, results, context, **kwargs):
         self.handle_result(sender, results, context)
 
     def handle_result(self, sender, results, context):
-        self.data.append((sender, results, context))
+        if os.getpid() != self.pid:
+            self.start_shard()
+        record = self.encoder.encode(sender, results, context)
+        self.data.append(to_frame(record))
+        if self.stream is not None and len(self.data) >= self.batch_size:
+            self.flush()
+
+
+def append_datafile(target, source_path):
+    """ appends the records of the datafile at source_path to target """
+    with open(source_path, 'rb') as source:
+        if source.read(len(HEADER)) == HEADER:
+            copy_frames(source, target)
+            return
+        source.seek(0)
+        encoder = RecordEncoder()
+        for record in Reader(source_path).deserialize(source):
+            target.write(to_frame(encoder.encode(*record)))
+
+
+def merge_datafiles(target_path, source_paths):
+    """
+        combines the datafiles of e.g.: multiple test runs or CI nodes. The
+        records are streamed, so none of the files is loaded into memory
+    """
+    with open(target_path, 'wb') as target:
+        target.write(HEADER)
+        for source_path in source_paths:
+            append_datafile(target, source_path)
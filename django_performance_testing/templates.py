@@ -1,7 +1,7 @@
 from django.template import Template
 from .context import scoped_context
-from .queries import QueryCollector, QueryBatchLimit
-from .timing import TimeCollector, TimeLimit
+from .utils import multi_context_manager
+from . import core as djpt_core
 
 try:
     orig_template_render
@@ -9,19 +9,20 @@ except NameError:
     orig_template_render = Template.render
 
 id_ = 'Template.render'
-querycount_collector = QueryCollector(id_=id_)
-querycount_limit = QueryBatchLimit(collector_id=id_, settings_based=True)
-
-time_collector = TimeCollector(id_=id_)
-time_limit = TimeLimit(collector_id=id_, settings_based=True)
+limits = []
 
 
 def template_render_that_fails_for_too_many_queries(template_self, *a, **kw):
+    # new collectors for each render, as templates are rendered nested (e.g.:
+    # {% include %}), and concurrently (e.g.: in threads)
+    collectors = [limit.collector_cls(id_=id_) for limit in limits]
     with scoped_context(key='template', value=template_self.name):
-        with querycount_collector:
-            with time_collector:
-                return orig_template_render(template_self, *a, **kw)
+        with multi_context_manager(collectors):
+            return orig_template_render(template_self, *a, **kw)
 
 
 def integrate_into_django_templates():
+    del limits[:]
+    for limit_cls in djpt_core.limits_registry.name2cls.values():
+        limits.append(limit_cls(collector_id=id_, settings_based=True))
     Template.render = template_render_that_fails_for_too_many_queries
@@ -1,7 +1,7 @@
 from django.test.client import Client
 from django_performance_testing.context import scoped_context
-from django_performance_testing.queries import QueryCollector, QueryBatchLimit
-from django_performance_testing.timing import TimeCollector, TimeLimit
+from django_performance_testing.utils import multi_context_manager
+from django_performance_testing import core as djpt_core
 
 orig_client_request = Client.request
 
@@ -9,17 +9,19 @@ orig_client_request = Client.request
 def client_request_that_fails_for_too_many_queries(client_self, **request):
     key = 'Client.request'
     value = '{} {}'.format(request['REQUEST_METHOD'], request['PATH_INFO'])
+    # new collectors for each request, as requests can run concurrently
+    # (e.g.: in threads), or nested (e.g.: a view using the test client)
+    collectors = [
+        limit.collector_cls(id_=limit.collector_id)
+        for limit in Client._djpt_limits]
     with scoped_context(key=key, value=value):
-        with client_self._querycount_collector:
-            with client_self._time_collector:
-                return orig_client_request(client_self, **request)
+        with multi_context_manager(collectors):
+            return orig_client_request(client_self, **request)
 
 
 def integrate_into_test_client():
     id_ = 'django.test.client.Client'
-    Client._querycount_collector = QueryCollector(id_=id_)
-    Client._querycount_limit = QueryBatchLimit(
-        collector_id=id_, settings_based=True)
-    Client._time_collector = TimeCollector(id_=id_)
-    Client._time_limit = TimeLimit(collector_id=id_, settings_based=True)
+    Client._djpt_limits = [
+        limit_cls(collector_id=id_, settings_based=True)
+        for limit_cls in djpt_core.limits_registry.name2cls.values()]
     Client.request = client_request_that_fails_for_too_many_queries
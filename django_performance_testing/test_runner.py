@@ -2,7 +2,7 @@
 from django.conf import settings
 from django.test import utils
 from django_performance_testing.serializer import \
-    Writer, get_datafile_path
+    Writer, get_datafile_path, get_datafile_batch_size
 from django_performance_testing.utils import \
     multi_context_manager, wrap_cls_method_in_ctx_manager
 from django_performance_testing.context import scoped_context
@@ -24,10 +24,13 @@ class DjptTestRunnerMixin(object):
             need to override run() to print things after
         """
         datafile_path = get_datafile_path()
-        self.djpt_writer = Writer(datafile_path)
+        self.djpt_writer = Writer(
+            datafile_path, batch_size=get_datafile_batch_size())
         self.djpt_writer.start()
-        retval = super(DjptTestRunnerMixin, self).run(*a, **kw)
-        self.djpt_writer.end()
+        try:
+            retval = super(DjptTestRunnerMixin, self).run(*a, **kw)
+        finally:
+            self.djpt_writer.end()
         if getattr(settings, 'DJPT_PRINT_WORST_REPORT', True):
             self.stream.write(
                 'To see the Worst Performing Items report, '
@@ -1,6 +1,23 @@
-from time import time
+import signal
+import sys
+import threading
+from django_performance_testing import context
 from django_performance_testing.core import \
-    BaseCollector, BaseLimit, NameValueResult
+    BaseCollector, BaseLimit, LimitViolationError, NameValueResult, \
+    get_connected_limits
+
+try:
+    # not affected by system clock adjustments
+    from time import perf_counter as wall_clock
+except ImportError:  # python 2
+    from timeit import default_timer as wall_clock
+try:
+    from time import thread_time as cpu_clock
+except ImportError:
+    try:
+        from time import process_time as cpu_clock
+    except ImportError:  # python 2, where it's the process' cpu time on unix
+        from time import clock as cpu_clock
 
 
 class TimeCollector(BaseCollector):
@@ -8,15 +25,158 @@ class TimeCollector(BaseCollector):
     type_name = 'time'
 
     def __enter__(self):
-        self.start = time()
+        self.start = wall_clock()
+        self.cpu_start = cpu_clock()
+        self.watchdog = Watchdog.start_for(self)
         return self
 
+    def before_exit(self):
+        if self.watchdog is not None:
+            self.watchdog.stop()
+
     def get_results_to_send(self):
-        return [NameValueResult(name='total', value=time() - self.start)]
+        total = wall_clock() - self.start
+        cpu = cpu_clock() - self.cpu_start
+        return to_results(total=total, cpu=cpu)
 
     @classmethod
     def get_sample_results(cls):
-        return [0.01, 1.00, 3.2]
+        return [
+            to_results(total=total, cpu=cpu)
+            for (total, cpu) in [(0.01, 0.01), (1.00, 0.25), (3.2, 3.1)]
+        ]
+
+
+def to_results(total, cpu):
+    """
+        the cpu time is stable even on noisy, shared machines, while the
+        rest of the elapsed time - e.g.: waiting for the database, or for
+        other processes to be scheduled - is the wait time
+    """
+    return [
+        NameValueResult(name='total', value=total),
+        NameValueResult(name='cpu', value=cpu),
+        NameValueResult(name='wait', value=max(total - cpu, 0)),
+    ]
+
+
+class WatchdogResult(NameValueResult):
+
+    __slots__ = ()
+
+    def get_details(self):
+        return 'interrupted by the watchdog'
+
+
+class Watchdog(object):
+    """
+        Enforces the watchdog timeout of the TimeLimits (total * watchdog)
+        of a running TimeCollector. In the main thread the scope is
+        interrupted by raising the LimitViolationError from a SIGALRM
+        handler. Elsewhere, or when SIGALRM is in use by something else, it
+        can only be reported from a timer thread while the scope still runs.
+    """
+
+    def __init__(self, collector, limit, timeout):
+        self.collector = collector
+        self.limit = limit
+        self.deadline = collector.start + timeout
+        self.timer = None
+
+    @classmethod
+    def start_for(cls, collector):
+        limits = [
+            (limit.watchdog_timeout, limit)
+            for limit in get_connected_limits(collector)
+            if getattr(limit, 'watchdog_timeout', None) is not None]
+        if not limits:
+            return None
+        timeout, limit = min(limits, key=lambda item: item[0])
+        watchdog = cls(collector, limit, timeout)
+        if can_interrupt():
+            _alarms.arm(watchdog)
+        else:
+            watchdog.timer = threading.Timer(timeout, watchdog.report)
+            watchdog.timer.daemon = True
+            watchdog.timer.start()
+        return watchdog
+
+    def stop(self):
+        if self.timer is not None:
+            self.timer.cancel()
+        else:
+            _alarms.disarm(self)
+
+    def get_result(self):
+        elapsed = wall_clock() - self.collector.start
+        return WatchdogResult(name='total', value=elapsed)
+
+    def interrupt(self):
+        raise LimitViolationError(
+            limit_obj=self.limit, result=self.get_result(),
+            context=context.current.snapshot)
+
+    def report(self):
+        collector_text = ''
+        if not self.limit.is_anonymous():
+            collector_text = ' (for {})'.format(self.limit.collector_id)
+        sys.stderr.write(
+            'DJPT watchdog: still running after {:.3f} elapsed seconds{} '
+            '(limit: {})\n'.format(
+                self.get_result().value, collector_text,
+                self.limit.data.get('total')))
+
+
+def can_interrupt():
+    if not hasattr(signal, 'setitimer'):
+        return False
+    if not isinstance(threading.current_thread(), threading._MainThread):
+        return False
+    return signal.getsignal(signal.SIGALRM) in (
+        signal.SIG_DFL, signal.SIG_IGN, None, _alarms.handle_alarm)
+
+
+class AlarmScheduler(object):
+    """ a single real-time interval timer shared by the nested watchdogs """
+
+    def __init__(self):
+        self.watchdogs = []
+        self.previous_handler = None
+
+    def arm(self, watchdog):
+        if not self.watchdogs:
+            self.previous_handler = signal.signal(
+                signal.SIGALRM, self.handle_alarm)
+        self.watchdogs.append(watchdog)
+        self.schedule()
+
+    def disarm(self, watchdog):
+        if watchdog not in self.watchdogs:
+            return  # it has interrupted its scope already
+        self.watchdogs.remove(watchdog)
+        if self.watchdogs:
+            self.schedule()
+            return
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, self.previous_handler or signal.SIG_DFL)
+
+    def schedule(self):
+        deadline = min(watchdog.deadline for watchdog in self.watchdogs)
+        remaining = max(deadline - wall_clock(), 1e-6)
+        signal.setitimer(signal.ITIMER_REAL, remaining)
+
+    def handle_alarm(self, signum, frame):
+        now = wall_clock()
+        expired = [w for w in self.watchdogs if w.deadline <= now]
+        if not expired:
+            self.schedule()
+            return
+        watchdog = min(expired, key=lambda w: w.deadline)
+        self.disarm(watchdog)
+        watchdog.interrupt()
+
+
+_alarms = AlarmScheduler()
 
 
 class TimeLimit(BaseLimit):
@@ -24,3 +184,15 @@ class TimeLimit(BaseLimit):
 
     quantifier = 'many'
     items_name = 'elapsed seconds'
+
+    @property
+    def watchdog_timeout(self):
+        """
+            with e.g.: TimeLimit(total=0.2, watchdog=5), the scope is
+            interrupted once it runs for 5 times its limit, i.e.: 1 second
+        """
+        multiple = self.data.get('watchdog')
+        total = self.data.get('total')
+        if multiple is None or total is None:
+            return None
+        return total * multiple
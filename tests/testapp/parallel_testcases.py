@@ -0,0 +1,31 @@
+# test cases for the parallel test runner need to be importable (picklable),
+# and this module is not collected by pytest
+import unittest
+from django.contrib.auth.models import Group
+from django_performance_testing.signals import results_collected
+from testapp.test_helpers import WithId
+
+
+class FirstParallelTestCase(unittest.TestCase):
+
+    def test_one(self):
+        results_collected.send(
+            sender=WithId('parallel'), results=[1], context={'test': 'one'})
+
+    def test_two(self):
+        results_collected.send(
+            sender=WithId('parallel'), results=[2], context={'test': 'two'})
+
+
+class SecondParallelTestCase(unittest.TestCase):
+
+    def test_three(self):
+        results_collected.send(
+            sender=WithId('parallel'), results=[3],
+            context={'test': 'three'})
+
+
+class QueryLimitViolatingParallelTestCase(unittest.TestCase):
+
+    def test_queries(self):
+        list(Group.objects.all())
@@ -29,6 +29,10 @@ class RunnerTestCasePackage(object):
             tests = django_runner.test_loader.loadTestsFromTestCase(
                 testcase_cls)
             self.suite.addTests(tests)
+        parallel = runner_options.get('parallel', 0)
+        if parallel > 1:
+            self.suite = django_runner.parallel_test_suite(
+                self.suite, parallel, django_runner.failfast)
         self.test_runner = django_runner.test_runner(
             resultclass=django_runner.get_resultclass(),
             stream=six.StringIO()
@@ -81,6 +85,11 @@ class capture_result_collected(object):
         results_collected.disconnect(self.results_collected_handler)
 
 
+def get_results(collected):
+    """ name -> value of the results of a capture_result_collected call """
+    return dict((r.name, r.value) for r in collected['results'])
+
+
 class override_current_context(object):
     def __enter__(self):
         self.orig_current_context = context.current
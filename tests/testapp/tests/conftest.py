@@ -1,16 +1,29 @@
 import os
 import tempfile
 import pytest
+from django_performance_testing.caching import CacheCollector, CacheLimit
+from django_performance_testing.garbage_collection import \
+    GCCollector, GCLimit
+from django_performance_testing.instances import \
+    InstancesCollector, InstancesLimit
+from django_performance_testing.memory import MemoryCollector, MemoryLimit
 from django_performance_testing.queries import QueryCollector, QueryBatchLimit
+from django_performance_testing.resources import \
+    ResourceCollector, ResourceLimit
 from django_performance_testing.timing import TimeCollector, TimeLimit
 
 
-@pytest.fixture(params=[QueryCollector, TimeCollector])
+@pytest.fixture(params=[
+    QueryCollector, TimeCollector, MemoryCollector, ResourceCollector,
+    GCCollector, CacheCollector, InstancesCollector])
 def collector_cls(request):
     return request.param
 
 
-@pytest.fixture(params=[QueryBatchLimit, TimeLimit])
+@pytest.fixture(
+    params=[
+        QueryBatchLimit, TimeLimit, MemoryLimit, ResourceLimit, GCLimit,
+        CacheLimit, InstancesLimit])
 def limit_cls(request):
     return request.param
 
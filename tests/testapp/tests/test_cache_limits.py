@@ -0,0 +1,130 @@
+from django.core.cache import caches
+from django.template import Context, Template
+from django_performance_testing.caching import CacheCollector, CacheLimit
+from django_performance_testing.core import LimitViolationError
+import pytest
+import threading
+from testapp.test_helpers import capture_result_collected, get_results
+
+
+@pytest.fixture
+def cache():
+    cache = caches['default']
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def collect(fn, scope=CacheCollector):
+    with capture_result_collected() as captured:
+        with scope():
+            retval = fn()
+    return get_results(captured.calls[0]), retval
+
+
+def test_it_has_the_correct_attributes():
+    assert CacheLimit.collector_cls == CacheCollector
+    assert CacheLimit.quantifier == 'many'
+    assert CacheLimit.items_name == 'cache operations'
+
+
+def limiting_bytes():
+    return CacheLimit(bytes_read=2**30, bytes_written=2**30)
+
+
+def test_counts_hits_and_misses(cache):
+    cache.set('present', 'value')
+
+    def get_both():
+        return [cache.get('present'), cache.get('absent', 'default')]
+
+    results, retval = collect(get_both)
+    assert retval == ['value', 'default']
+    assert results['calls'] == results['reads'] == 2
+    assert results['hits'] == results['misses'] == 1
+
+
+def test_bytes_are_only_measured_for_limits_on_them(cache):
+    cache.set('present', 'value')
+    results, _ = collect(lambda: cache.get('present'))
+    assert 'bytes_read' not in results
+    results, _ = collect(lambda: cache.get('present'), scope=limiting_bytes)
+    assert results['bytes_read'] > 0
+
+
+def test_a_stored_value_that_equals_the_default_is_a_hit(cache):
+    cache.set('none', None)
+    results, retval = collect(lambda: cache.get('none'))
+    assert retval is None
+    assert results['hits'] == 1
+    assert results['misses'] == 0
+
+
+def test_get_many_counts_each_key(cache):
+    cache.set('a', 1)
+    results, retval = collect(
+        lambda: cache.get_many(key for key in ['a', 'b', 'c']))
+    assert retval == {'a': 1}
+    assert results['hits'] == 1
+    assert results['misses'] == 2
+
+
+def test_counts_writes_and_deletes(cache):
+    def write_and_delete():
+        cache.set('a', 'x' * 1000)
+        cache.add('b', 1)
+        cache.delete('a')
+
+    results, _ = collect(write_and_delete, scope=limiting_bytes)
+    assert results['writes'] == 2
+    assert results['deletes'] == 1
+    assert results['calls'] == 3
+    assert results['bytes_written'] >= 1000
+
+
+def test_calls_made_by_other_cache_calls_are_not_counted(cache):
+    cache.set('counter', 1)
+    results, retval = collect(lambda: cache.incr('counter'))
+    assert retval == 2
+    assert results['calls'] == results['writes'] == 1
+    assert results['reads'] == 0
+
+
+def test_counts_the_calls_of_all_cache_aliases(cache):
+    results, _ = collect(lambda: caches['sessions'].get('key'))
+    assert results['misses'] == 1
+
+
+def test_nothing_is_counted_outside_of_collectors(cache):
+    with capture_result_collected() as captured:
+        with CacheCollector():
+            pass
+        cache.get('outside')
+    assert [r.value for r in captured.calls[0]['results']] == [0] * 6
+
+
+def test_only_the_calls_of_the_current_thread_are_counted(cache):
+    thread = threading.Thread(target=lambda: cache.get('other thread'))
+    results, _ = collect(lambda: [thread.start(), thread.join()])
+    assert results['calls'] == 0
+
+
+def test_can_limit_cache_misses(cache):
+    with pytest.raises(LimitViolationError) as excinfo:
+        with CacheLimit(misses=1):
+            for key in ['a', 'b']:
+                cache.get(key)
+    assert excinfo.value.base_error_msg == \
+        'Too many (2) misses cache operations (limit: 1)'
+
+
+def test_can_limit_cache_operations_through_settings(cache, settings):
+    settings.PERFORMANCE_LIMITS = {'Template.render': {'cache': {'calls': 0}}}
+
+    class CacheReader(object):
+        def __str__(self):
+            return str(cache.get('key'))
+
+    with pytest.raises(LimitViolationError) as excinfo:
+        Template('{{ reader }}').render(Context({'reader': CacheReader()}))
+    assert excinfo.value.name == 'calls'
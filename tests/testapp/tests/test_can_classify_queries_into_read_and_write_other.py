@@ -1,4 +1,5 @@
 import pytest
+from django_performance_testing import queries
 from django_performance_testing.queries import classify_query
 
 
@@ -48,3 +49,67 @@ def test_can_classify_even_if_it_has_quotes_inside():
 def test_when_cannot_classifies_error_includes_full_sql():
     sql = 'unrecognizable sql statement'
     assert 'other' == classify_query(sql)
+
+
+@pytest.mark.parametrize('sql,expected', [
+    ('select "auth_group"."id" from "auth_group"', 'read'),
+    ('  \n\tSELECT 1', 'read'),
+    ('/* from the report view */ SELECT 1', 'read'),
+    ('-- from the report view\nUPDATE "auth_group" SET "name" = %s', 'write'),
+    ('(SELECT 1) UNION (SELECT 2)', 'read'),
+    ('SAVEPOINT "s140_x1"', 'other'),
+    ('RELEASE SAVEPOINT "s140_x1"', 'other'),
+    ('ROLLBACK TO SAVEPOINT "s140_x1"', 'other'),
+    ('WITH "recent" AS (SELECT "id" FROM "auth_group" WHERE "id" > %s) '
+     'SELECT * FROM "recent"', 'read'),
+    ('WITH RECURSIVE "t"("n") AS (SELECT 1 UNION ALL SELECT "n" + 1 FROM '
+     '"t") SELECT "n" FROM "t"', 'read'),
+    ('with "old" as (select "id" from "auth_group") '
+     'delete from "auth_group" where "id" in (select "id" from "old")',
+     'write'),
+    ('QUERY - \'BEGIN TRANSACTION\' - PARAMS = ()', 'other'),
+    ('QUERY - \'UPDATE "auth_group" SET "name" = %s\' - PARAMS = (1,)',
+     'write'),
+], ids=[
+    'lowercase', 'leading-whitespace', 'block-comment', 'line-comment',
+    'parenthesized', 'savepoint', 'release', 'rollback', 'cte-select',
+    'recursive-cte', 'lowercase-cte-delete', 'sample-other', 'sample-write',
+])
+def test_classifies_statements_by_their_main_keyword(sql, expected):
+    assert expected == classify_query(sql)
+
+
+def test_classification_is_extensible_via_settings(settings):
+    sql = 'MERGE INTO "auth_group" USING "new_groups" ON 1 = 1'
+    assert 'other' == classify_query(sql)
+    settings.DJPT_QUERY_CLASSIFICATION = {'merge': 'write', 'CALL': 'call'}
+    assert 'write' == classify_query(sql)
+    assert 'call' == classify_query('CALL refresh_groups()')
+    settings.DJPT_QUERY_CLASSIFICATION = {}
+    assert 'other' == classify_query(sql)
+
+
+def test_caches_classification_by_the_beginning_of_the_statement():
+    queries._classification_cache.clear()
+    sql = 'SELECT "auth_group"."id" FROM "auth_group" LIMIT 1'
+    classify_query(sql)
+    assert queries._classification_cache == {
+        sql[:queries.CLASSIFICATION_PREFIX_LENGTH]: 'read'}
+
+
+@pytest.mark.parametrize('sql', [
+    'WITH "x" AS (SELECT 1) UPDATE "auth_group" SET "name" = %s',
+    '/* a comment that is longer than the cached prefix */ SELECT 1',
+], ids=['cte', 'long-comment'])
+def test_does_not_cache_when_the_beginning_does_not_decide(sql):
+    queries._classification_cache.clear()
+    classify_query(sql)
+    assert queries._classification_cache == {}
+
+
+def test_classification_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(queries, 'MAX_CACHED_CLASSIFICATIONS', 3)
+    queries._classification_cache.clear()
+    for i in range(10):
+        classify_query('SELECT {} FROM "auth_group"'.format(i))
+        assert len(queries._classification_cache) <= 3
@@ -0,0 +1,38 @@
+import pytest
+from django_performance_testing.queries import get_tables
+
+
+@pytest.mark.parametrize('sql,tables', [
+    ('SELECT "auth_group"."id" FROM "auth_group"', ('auth_group',)),
+    ('SELECT "auth_group"."id" FROM "auth_group" INNER JOIN '
+     '"auth_user_groups" ON ("auth_group"."id" = '
+     '"auth_user_groups"."group_id") WHERE "auth_user_groups"."user_id" = 1',
+     ('auth_group', 'auth_user_groups')),
+    ('INSERT INTO "auth_group" ("name") VALUES (%s)', ('auth_group',)),
+    ('UPDATE "auth_group" SET "name" = %s', ('auth_group',)),
+    ('DELETE FROM "auth_group" WHERE "id" IN (SELECT U0."id" FROM '
+     '"auth_user" U0)', ('auth_group', 'auth_user')),
+    ('select id from auth_group', ('auth_group',)),
+    ('SELECT `id` FROM `auth_group`', ('auth_group',)),
+    ('SELECT "id" FROM "public"."auth_group"', ('auth_group',)),
+    ('SELECT "id" FROM "auth_group" WHERE "name" = \'from nowhere\'',
+     ('auth_group',)),
+    ('SELECT "from_date" FROM "events"', ('events',)),
+    ('SAVEPOINT "s1_x1"', ()),
+    ('SELECT "app_event"."id" FROM "app_event" WHERE '
+     'EXTRACT(\'year\' FROM "app_event"."created") = 2016', ('app_event',)),
+    ('SELECT SUBSTRING("name" FROM 1 FOR 3) FROM "auth_group"',
+     ('auth_group',)),
+    ('SELECT "a"."id" FROM "a", "b" WHERE "a"."id" = "b"."id"', ('a', 'b')),
+    ('SELECT x.id FROM a x, public.b AS y, c WHERE x.id = y.id',
+     ('a', 'b', 'c')),
+    ('SELECT "id" FROM "auth_group" ORDER BY "name", "id"', ('auth_group',)),
+    ('SELECT 1 FROM "a" WHERE EXISTS(SELECT 1 FROM "b")', ('a', 'b')),
+    ('SELECT "id" FROM "auth_group" FOR UPDATE NOWAIT', ('auth_group',)),
+], ids=[
+    'select', 'join', 'insert', 'update', 'subquery', 'unquoted',
+    'backticks', 'schema', 'literal', 'column-name', 'no-table',
+    'extract', 'substring', 'comma-join', 'comma-join-aliases',
+    'order-by-list', 'exists', 'for-update'])
+def test_can_extract_the_referenced_tables(sql, tables):
+    assert tables == get_tables(sql)
@@ -0,0 +1,57 @@
+import pytest
+from django_performance_testing import queries
+from django_performance_testing.queries import fingerprint_query
+
+
+@pytest.mark.parametrize('first,second', [
+    ('SELECT "auth_group"."name" FROM "auth_group" WHERE "id" = 1',
+     'SELECT "auth_group"."name" FROM "auth_group" WHERE "id" = 42'),
+    ('SELECT "id" FROM "auth_group" WHERE "name" = \'foo\'',
+     'SELECT "id" FROM "auth_group" WHERE "name" = \'it\'\'s bar\''),
+    ('SELECT "id" FROM "auth_group" WHERE "id" IN (1, 2, 3)',
+     'SELECT "id" FROM "auth_group" WHERE "id" IN (4)'),
+    ('SELECT "id" FROM "auth_group" WHERE "id" IN (%s, %s)',
+     'SELECT "id" FROM "auth_group" WHERE "id" IN (%s,%s,%s)'),
+    ('INSERT INTO "auth_group" ("name") VALUES (%s), (%s)',
+     'INSERT INTO "auth_group" ("name") VALUES (%s)'),
+    ('SELECT "id"\n  FROM "auth_group" LIMIT 21',
+     'SELECT "id" FROM "auth_group" LIMIT 1'),
+    ('QUERY = u\'SELECT "id" FROM "auth_group" WHERE "id" = %s\' '
+     '- PARAMS = (1,)',
+     'QUERY = \'SELECT "id" FROM "auth_group" WHERE "id" = %s\' '
+     '- PARAMS = (2,)'),
+], ids=[
+    'numbers', 'strings', 'in-lists', 'placeholder-lists',
+    'multi-row-values', 'whitespace', 'django-1.8-params'])
+def test_same_statement_with_different_params_has_same_fingerprint(
+        first, second):
+    assert fingerprint_query(first) == fingerprint_query(second)
+
+
+@pytest.mark.parametrize('first,second', [
+    ('SELECT "id" FROM "auth_group" WHERE "id" = 1',
+     'SELECT "id" FROM "auth_user" WHERE "id" = 1'),
+    ('SELECT "table1"."id" FROM "table1"',
+     'SELECT "table2"."id" FROM "table2"'),
+    ('SELECT "id" FROM "auth_group" WHERE "id" IN (1, 2)',
+     'SELECT "id" FROM "auth_group" WHERE "name" IN (1, 2)'),
+], ids=['tables', 'identifiers-with-numbers', 'columns'])
+def test_different_statements_have_different_fingerprints(first, second):
+    assert fingerprint_query(first) != fingerprint_query(second)
+
+
+def test_fingerprint_is_readable():
+    sql = 'SELECT "id" FROM "auth_group" WHERE "id" IN (1, 2) AND "x" = \'y\''
+    assert fingerprint_query(sql) == \
+        'SELECT "id" FROM "auth_group" WHERE "id" IN (...) AND "x" = ?'
+
+
+def test_long_statements_are_not_kept_in_the_cache():
+    long_sql = 'INSERT INTO "auth_group" ("name") VALUES {}'.format(
+        ', '.join("('group {}')".format(i) for i in range(1000)))
+    short_sql = 'SELECT "id" FROM "auth_group" WHERE "id" = 1'
+    assert fingerprint_query(long_sql) == \
+        'INSERT INTO "auth_group" ("name") VALUES (...)'
+    fingerprint_query(short_sql)
+    assert long_sql not in queries._fingerprint_cache
+    assert short_sql in queries._fingerprint_cache
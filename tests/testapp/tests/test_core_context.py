@@ -1,4 +1,7 @@
+import copy
 import pytest
+import threading
+from django.utils.six.moves import cPickle as pickle
 from django_performance_testing import context
 from testapp.test_helpers import override_current_context
 Context = context.Context
@@ -60,3 +63,78 @@ class TestContext(object):
             with context.scoped_context(key='foo', value='bar'):
                 assert context.current.data == {'foo': ['bar']}
             assert context.current.data == {}
+
+    def test_each_thread_has_its_own_context(self):
+        ctx = Context()
+        ctx.enter(key='key', value='main thread')
+        seen_in_thread = []
+
+        def in_thread():
+            seen_in_thread.append(ctx.data)
+            ctx.enter(key='key', value='other thread')
+            seen_in_thread.append(ctx.data)
+
+        thread = threading.Thread(target=in_thread)
+        thread.start()
+        thread.join()
+        assert seen_in_thread == [{}, {'key': ['other thread']}]
+        assert ctx.data == {'key': ['main thread']}
+
+    @pytest.mark.skipif(
+        context.contextvars is None, reason='needs contextvars')
+    def test_each_task_has_its_own_context(self):
+        ctx = Context()
+        ctx.enter(key='key', value='outer')
+        task_context = context.contextvars.copy_context()
+        task_context.run(ctx.enter, key='key', value='task')
+        assert task_context.run(lambda: ctx.data) == \
+            {'key': ['outer', 'task']}
+        assert ctx.data == {'key': ['outer']}
+
+
+class TestContextSnapshot(object):
+
+    def test_snapshot_equals_the_data(self):
+        ctx = Context()
+        ctx.enter(key='key', value='first')
+        ctx.enter(key='key', value='second')
+        assert ctx.snapshot == {'key': ['first', 'second']}
+        ctx.exit(key='key', value='second')
+        assert ctx.snapshot == {'key': ['first']}
+        ctx.exit(key='key', value='first')
+        assert ctx.snapshot == {}
+
+    def test_snapshot_is_not_affected_by_later_changes(self):
+        ctx = Context()
+        ctx.enter(key='key', value='first')
+        snapshot = ctx.snapshot
+        ctx.enter(key='key', value='second')
+        ctx.enter(key='other', value='value')
+        assert snapshot == {'key': ['first']}
+
+    def test_snapshot_cannot_be_changed(self):
+        ctx = Context()
+        ctx.enter(key='key', value='value')
+        with pytest.raises(TypeError):
+            ctx.snapshot['other'] = ['value']
+        with pytest.raises(TypeError):
+            ctx.snapshot.update({'other': ['value']})
+        with pytest.raises(TypeError):
+            ctx.snapshot['key'].append('other value')
+        assert ctx.snapshot == {'key': ['value']}
+
+    def test_unchanged_keys_are_shared_between_snapshots(self):
+        ctx = Context()
+        ctx.enter(key='shared', value='value')
+        before = ctx.snapshot
+        ctx.enter(key='changed', value='value')
+        assert ctx.snapshot['shared'] is before['shared']
+
+    def test_snapshot_can_be_pickled_and_copied(self):
+        ctx = Context()
+        ctx.enter(key='key', value='value')
+        for copied in [
+                pickle.loads(pickle.dumps(ctx.snapshot)),
+                copy.deepcopy(ctx.snapshot)]:
+            assert copied == {'key': ['value']}
+            assert isinstance(copied, context.ContextSnapshot)
@@ -1,6 +1,11 @@
+import gc
 import pytest
+from django.utils.six.moves import cPickle as pickle
 from django_performance_testing.core import \
-    BaseLimit, BaseCollector, LimitViolationError, NameValueResult
+    BaseLimit, BaseCollector, LimitViolationError, NameValueResult, \
+    get_settings_based_limits, limits_dispatcher
+from django.test.utils import override_settings
+from django_performance_testing.queries import QueryCountResult
 from django_performance_testing.signals import results_collected
 from testapp.sixmock import patch, Mock
 from testapp.test_helpers import \
@@ -110,6 +115,46 @@ class TestCollectors(object):
         assert len(sample_results) > 0
 
 
+class TestNameValueResults(object):
+
+    def test_compares_with_numbers(self):
+        result = NameValueResult(name='total', value=2)
+        assert result < 3 and result <= 2 and result >= 2 and result > 1.5
+        assert result == 2 and result != 3
+        assert result == pytest.approx(2.0)
+
+    def test_compares_with_other_results_by_value(self):
+        result = NameValueResult(name='total', value=2)
+        queries = QueryCountResult(name='total', queries=[{}, {}])
+        assert result == queries and not result != queries
+        assert NameValueResult(name='total', value=1) < queries
+        assert max([queries, NameValueResult('total', 5), result]).value == 5
+
+    def test_has_no_instance_dict(self):
+        for result in [
+                NameValueResult(name='total', value=1),
+                QueryCountResult(name='total', value=1)]:
+            assert not hasattr(result, '__dict__')
+
+    def test_query_results_take_the_queries_first(self):
+        result = QueryCountResult([{}, {}], 'total')
+        assert (result.name, result.value) == ('total', 2)
+
+    @pytest.mark.parametrize('kwargs', [
+        {'name': 'total'}, {'queries': [], 'value': 0}])
+    def test_query_results_need_a_name_and_the_queries_or_value(self, kwargs):
+        with pytest.raises(TypeError):
+            QueryCountResult(**kwargs)
+
+    @pytest.mark.parametrize(
+        'protocol', range(pickle.HIGHEST_PROTOCOL + 1))
+    def test_can_be_pickled(self, protocol):
+        result = QueryCountResult(name='total', queries=[{'sql': 'SELECT 1'}])
+        unpickled = pickle.loads(pickle.dumps(result, protocol))
+        assert (unpickled.name, unpickled.value, unpickled.queries) == \
+            ('total', 1, [{'sql': 'SELECT 1'}])
+
+
 class TestLimits(object):
     def test_limit_knows_its_collector(self, limit_cls):
         assert hasattr(limit_cls, 'collector_cls')
@@ -378,5 +423,68 @@ class TestCreatingSettingsBasedLimits(object):
         }
         assert limit.data == {'good': 'config'}
 
+    def test_data_follows_override_settings(self, limit_cls):
+        id_ = 'overridden'
+        limit = limit_cls(collector_id=id_, settings_based=True)
+        limits = {id_: {limit.type_name: {'total': 1}}}
+        assert limit.data == {}
+        with override_settings(PERFORMANCE_LIMITS=limits):
+            assert limit.data == {'total': 1}
+            with override_settings(PERFORMANCE_LIMITS={}):
+                assert limit.data == {}
+            assert limit.data == {'total': 1}
+        assert limit.data == {}
+
+    def test_settings_are_only_read_once_until_changed(self, settings):
+        settings.PERFORMANCE_LIMITS = {'id': {'type': {'total': 1}}}
+        compiled = get_settings_based_limits()
+        assert compiled == {('id', 'type'): {'total': 1}}
+        assert get_settings_based_limits() is compiled
+        settings.PERFORMANCE_LIMITS = {}
+        assert get_settings_based_limits() == {}
+
 
 # TODO: what to do w/ reports, where one'd listen on more than one collector?
+
+
+class TestLimitsDispatcher(object):
+
+    def test_finds_only_the_limits_listening_to_the_collector(self, limit_cls):
+        collector = limit_cls.collector_cls(id_='dispatched')
+        named = limit_cls(collector_id='dispatched')
+        other_id = limit_cls(collector_id='not dispatched')  # noqa: F841
+        anonymous = limit_cls()
+        assert limits_dispatcher.get_limits(collector) == [named]
+        with anonymous:
+            assert limits_dispatcher.get_limits(anonymous.collector) == \
+                [anonymous]
+        assert limits_dispatcher.get_limits(anonymous.collector) == []
+
+    def test_deleted_limits_are_removed_from_the_index(self, limit_cls):
+        collector = limit_cls.collector_cls(id_='deleted limit')
+        limit = limit_cls(collector_id='deleted limit')
+        key = limits_dispatcher.get_key(limit)
+        assert key in limits_dispatcher.index
+        del limit
+        gc.collect()
+        assert key not in limits_dispatcher.index
+        assert limits_dispatcher.get_limits(collector) == []
+
+    def test_calls_all_the_limits_then_raises_the_first_error(self):
+
+        class FailingLimit(BaseLimit):
+            collector_cls = BaseCollector
+            calls = []
+
+            def handle_results(self, results, context):
+                self.calls.append(self.data['name'])
+                raise ValueError(self.data['name'])
+
+        collector = BaseCollector(id_='failing')
+        limits = [  # noqa: F841
+            FailingLimit(collector_id='failing', name='first'),
+            FailingLimit(collector_id='failing', name='second')]
+        with pytest.raises(ValueError) as excinfo:
+            results_collected.send(sender=collector, results=[], context={})
+        assert str(excinfo.value) == 'first'
+        assert FailingLimit.calls == ['first', 'second']
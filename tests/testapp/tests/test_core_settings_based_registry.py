@@ -1,7 +1,12 @@
 from django_performance_testing import core
+from django_performance_testing.caching import CacheLimit
+from django_performance_testing.garbage_collection import GCLimit
+from django_performance_testing.instances import InstancesLimit
+from django_performance_testing.memory import MemoryLimit
 from django_performance_testing.queries import QueryBatchLimit
 from django_performance_testing.registry import \
     SettingsOrDefaultBasedRegistry, UniqueNamedClassRegistry
+from django_performance_testing.resources import ResourceLimit
 from django_performance_testing.timing import TimeLimit
 from testapp.sixmock import patch
 
@@ -60,10 +65,15 @@ def test_assert_configured_global_limits_registry(settings):
     assert core.limits_registry.settings_name == \
         'DJPT_KNOWN_LIMITS_DOTTED_PATHS'
     assert not hasattr(settings, core.limits_registry.settings_name)
-    assert len(core.limits_registry.name2cls) == 2
-    assert len(core.limits_registry.defaults) == 2
+    assert len(core.limits_registry.name2cls) == 7
+    assert len(core.limits_registry.defaults) == 7
     assert core.limits_registry.name2cls['QueryBatchLimit'] == QueryBatchLimit
     assert core.limits_registry.name2cls['TimeLimit'] == TimeLimit
+    assert core.limits_registry.name2cls['MemoryLimit'] == MemoryLimit
+    assert core.limits_registry.name2cls['ResourceLimit'] == ResourceLimit
+    assert core.limits_registry.name2cls['GCLimit'] == GCLimit
+    assert core.limits_registry.name2cls['CacheLimit'] == CacheLimit
+    assert core.limits_registry.name2cls['InstancesLimit'] == InstancesLimit
 
 
 def test_all_known_limits_are_present_in_the_gobal_registry(limit_cls):
@@ -0,0 +1,90 @@
+from django_performance_testing.core import LimitViolationError
+from django_performance_testing import garbage_collection
+from django_performance_testing.garbage_collection import \
+    GCCollector, GCLimit, can_collect
+import gc
+import pytest
+import threading
+import time
+from testapp.test_helpers import capture_result_collected, get_results
+
+pytestmark = pytest.mark.skipif(
+    not can_collect(), reason='gc.callbacks is not available')
+
+
+def create_garbage_cycles(nr_of_cycles):
+    for i in range(nr_of_cycles):
+        a, b = [], []
+        a.append(b)
+        b.append(a)
+
+
+def test_it_has_the_correct_attributes():
+    assert GCLimit.collector_cls == GCCollector
+    assert GCLimit.quantifier == 'many'
+    assert GCLimit.items_name == 'garbage collection'
+
+
+def test_reports_the_collections_within_the_scope():
+    gc.collect()
+    with capture_result_collected() as captured:
+        with GCCollector():
+            create_garbage_cycles(10)
+            gc.collect()
+    results = get_results(captured.calls[0])
+    assert results['gen2_collections'] >= 1
+    assert results['collections'] == sum(
+        results['gen{}_collections'.format(gen)] for gen in (0, 1, 2))
+    assert results['collected'] >= 20
+    assert 0 < results['max_pause'] <= results['pause']
+
+
+def test_callback_is_only_installed_while_collecting():
+    callbacks = list(gc.callbacks)
+    with GCCollector():
+        with GCCollector():
+            assert len(gc.callbacks) == len(callbacks) + 1
+        assert len(gc.callbacks) == len(callbacks) + 1
+    assert gc.callbacks == callbacks
+
+
+def test_callback_is_installed_once_by_concurrent_collectors(monkeypatch):
+    callbacks = list(gc.callbacks)
+    installed = []
+    orig_install = garbage_collection._callback.install
+
+    def slow_install():
+        orig_install()
+        time.sleep(0.001)  # lets the other threads run meanwhile
+
+    monkeypatch.setattr(garbage_collection._callback, 'install', slow_install)
+
+    def collect_repeatedly():
+        for _ in range(20):
+            with GCCollector():
+                installed.append(len(gc.callbacks) - len(callbacks))
+
+    threads = [threading.Thread(target=collect_repeatedly) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert set(installed) == set([1])
+    assert gc.callbacks == callbacks
+
+
+def test_nested_collectors_both_see_the_collection():
+    with capture_result_collected() as captured:
+        with GCCollector():
+            with GCCollector():
+                gc.collect()
+    inner, outer = map(get_results, captured.calls)
+    assert inner['gen2_collections'] == outer['gen2_collections'] == 1
+
+
+def test_can_limit_full_collections():
+    with pytest.raises(LimitViolationError) as excinfo:
+        with GCLimit(gen2_collections=0):
+            gc.collect()
+    assert excinfo.value.base_error_msg == \
+        'Too many (1) gen2_collections garbage collection (limit: 0)'
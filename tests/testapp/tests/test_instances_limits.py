@@ -0,0 +1,64 @@
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import post_init
+from django_performance_testing.core import LimitViolationError
+from django_performance_testing.instances import \
+    InstancesCollector, InstancesLimit
+import pytest
+from testapp.test_helpers import capture_result_collected, get_results
+
+
+def test_it_has_the_correct_attributes():
+    assert InstancesLimit.collector_cls == InstancesCollector
+    assert InstancesLimit.quantifier == 'many'
+    assert InstancesLimit.items_name == 'model instances'
+
+
+def test_counts_the_instances_created_per_model(db):
+    Group.objects.bulk_create([Group(name='one'), Group(name='two')])
+    with capture_result_collected() as captured:
+        with InstancesCollector():
+            list(Group.objects.all())
+            Permission(name='not saved')
+    results = get_results(captured.calls[0])
+    assert results == {
+        'total': 3,
+        'fetched': 2,
+        'model.auth.Group': 2,
+        'model.auth.Permission': 1,
+    }
+
+
+def test_deferred_instances_are_counted_for_their_model(db):
+    Group.objects.create(name='one')
+    with capture_result_collected() as captured:
+        with InstancesCollector():
+            list(Group.objects.only('id'))
+    results = get_results(captured.calls[0])
+    assert results['model.auth.Group'] == 1
+
+
+def test_values_querysets_create_no_instances(db):
+    Group.objects.create(name='one')
+    with capture_result_collected() as captured:
+        with InstancesCollector():
+            list(Group.objects.values('name'))
+    results = get_results(captured.calls[0])
+    assert results == {'total': 0, 'fetched': 0}
+
+
+def test_only_listens_for_post_init_while_collecting(db):
+    assert not post_init.has_listeners(Group)
+    with InstancesCollector():
+        with InstancesCollector():
+            assert post_init.has_listeners(Group)
+        assert post_init.has_listeners(Group)
+    assert not post_init.has_listeners(Group)
+
+
+def test_can_limit_the_number_of_instances(db):
+    Group.objects.bulk_create([Group(name=str(i)) for i in range(3)])
+    with pytest.raises(LimitViolationError) as excinfo:
+        with InstancesLimit(total=2):
+            list(Group.objects.all())
+    assert excinfo.value.base_error_msg == \
+        'Too many (3) total model instances (limit: 2)'
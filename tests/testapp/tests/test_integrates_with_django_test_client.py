@@ -4,6 +4,7 @@ from django.contrib.auth.models import Group
 from django.core.urlresolvers import reverse
 from django.http import HttpResponse
 from django_performance_testing.core import LimitViolationError
+from django_performance_testing.memory import tracemalloc
 from freezegun import freeze_time
 import pytest
 
@@ -84,3 +85,27 @@ def test_can_specify_limits_through_settings_for_django_test_client(
                 url=vctx.url, method=method)]}
         assert excinfo.value.items_name == items_name, \
             excinfo.value.base_error_msg
+
+
+class AllocatingView(RegisterSelfAsViewContextManager):
+
+    kept = []
+
+    def __call__(self, request):
+        self.kept.append(bytearray(self.value))
+        return HttpResponse()
+
+
+@pytest.mark.skipif(tracemalloc is None, reason='needs tracemalloc')
+@pytest.mark.urls(__name__)
+def test_can_specify_memory_limits_for_django_test_client(
+        db, settings, client):
+    settings.PERFORMANCE_LIMITS = {
+        'django.test.client.Client': {'memory': {'net': 2**20}}}
+    with AllocatingView(value=2 * 2**20) as vctx:
+        with pytest.raises(LimitViolationError) as excinfo:
+            vctx.request(client.get)
+        assert excinfo.value.context == {
+            'Client.request': ['GET {}'.format(vctx.url)]}
+    assert excinfo.value.name == 'net'
+    assert excinfo.value.items_name == 'allocated bytes'
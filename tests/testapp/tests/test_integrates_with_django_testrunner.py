@@ -5,12 +5,19 @@ from django.utils import six
 from django_performance_testing import test_runner as djpt_test_runner_module
 from django_performance_testing.serializer import Reader
 from freezegun import freeze_time
+import os
 import pytest
+from testapp import parallel_testcases
 from testapp.test_helpers import (override_current_context,
                                   run_testcases_with_django_runner)
 import unittest
 import re
 
+try:
+    import tblib
+except ImportError:  # only a test dependency of tox
+    tblib = None
+
 
 def to_dotted_name(cls):
     return '.'.join([cls.__module__, cls.__name__])
@@ -183,3 +190,40 @@ def test_limits_can_be_set_on_testcase_methods(db, settings, limit_name,
     reported_method = lve_msg.split('[')[-1].split(']')[0][1:-1]
     assert reported_method.startswith(method_name), lve_msg
     assert ATestCase.__name__ in reported_method, lve_msg
+
+
+def test_results_collected_in_parallel_workers_are_merged(
+        settings, tmpfilepath):
+    settings.DJPT_DATAFILE_PATH = tmpfilepath
+    run_testcases_with_django_runner(
+        [parallel_testcases.FirstParallelTestCase,
+         parallel_testcases.SecondParallelTestCase], nr_of_tests=3,
+        runner_options={'parallel': 2})
+    records = Reader(tmpfilepath).read_all()
+    sent_from_tests = sorted(
+        (results, context) for (sender, results, context) in records
+        if sender.id_ == 'parallel')
+    assert sent_from_tests == [
+        ([1], {'test': 'one'}), ([2], {'test': 'two'}),
+        ([3], {'test': 'three'})]
+    test_methods = set(
+        context['test name'][0] for (sender, results, context) in records
+        if sender.id_ == 'test method')
+    assert len(test_methods) == 3
+    assert not [
+        name for name in os.listdir(os.path.dirname(tmpfilepath))
+        if name.startswith(os.path.basename(tmpfilepath) + '.shard-')]
+
+
+@pytest.mark.skipif(
+    tblib is None, reason='needs tblib to send the errors of the workers')
+def test_limit_violations_are_reported_from_parallel_workers(db, settings):
+    settings.PERFORMANCE_LIMITS = {'test method': {'queries': {'total': 0}}}
+    test_run = run_testcases_with_django_runner(
+        [parallel_testcases.QueryLimitViolatingParallelTestCase,
+         parallel_testcases.SecondParallelTestCase],
+        nr_of_tests=2, all_should_pass=False, print_bad=False,
+        runner_options={'parallel': 2})
+    assert len(test_run['result'].errors) == 1
+    assert 'Too many (1) total queries (for test method) (limit: 0)' in \
+        test_run['output']
@@ -1,9 +1,11 @@
 from datetime import timedelta
 from django.contrib.auth.models import Group
-from django.template import loader
+from django.template import loader, Context, Template
 from django_performance_testing.core import LimitViolationError
+from django_performance_testing.queries import QueryCollector
 from freezegun import freeze_time
 import pytest
+from testapp.test_helpers import capture_result_collected
 
 
 def test_has_support_for_number_of_queries_in_templates(db, settings):
@@ -21,6 +23,20 @@ def test_has_support_for_number_of_queries_in_templates(db, settings):
     assert excinfo.value.context == {'template': ['all-group-names.markdown']}
 
 
+def test_nested_renders_are_measured_separately(db):
+    template = Template(
+        '{{ groups.count }}{{ groups.exists }}'
+        '{% include "all-group-names.markdown" %}')
+    with capture_result_collected() as captured:
+        template.render(Context({'groups': Group.objects.all()}))
+    totals = [
+        (call['context']['template'], result.value)
+        for call in captured.calls
+        if isinstance(call['sender'], QueryCollector)
+        for result in call['results'] if result.name == 'total']
+    assert totals == [([None, 'all-group-names.markdown'], 1), ([None], 3)]
+
+
 def test_has_support_for_elapsed_time_in_template_render(settings):
     settings.PERFORMANCE_LIMITS = {
         'Template.render': {
@@ -1,6 +1,11 @@
 import pytest
+from django.contrib.auth.models import Group
 from django.utils import six
-from django_performance_testing.core import LimitViolationError
+from django.utils.six.moves import cPickle as pickle
+from django_performance_testing.core import \
+    LimitViolationError, NameValueResult
+from django_performance_testing.queries import \
+    EXECUTE_WRAPPER, QueryBatchLimit
 from testapp.sixmock import MagicMock, PropertyMock
 
 
@@ -166,3 +171,28 @@ def test_clone_with_more_info_preserves_orig_arguments(val):
     assert id(cloned_lve.limit_obj) == id(lve.limit_obj)
     assert id(cloned_lve.result) == id(lve.result)
     assert cloned_lve.tb == 'foo'
+
+
+def test_can_be_pickled_e_g_to_report_from_parallel_test_workers():
+    limit = QueryBatchLimit(total=1)
+    result = NameValueResult(name='total', value=2)
+    lve = LimitViolationError(
+        limit_obj=limit, result=result, context={'test name': ['foo']},
+        tb='the traceback')
+    unpickled = pickle.loads(pickle.dumps(lve))
+    assert str(unpickled) == str(lve)
+    assert unpickled.context == {'test name': ['foo']}
+    assert unpickled.tb == 'the traceback'
+    assert unpickled.result == 2
+
+
+def test_can_be_pickled_with_the_state_of_the_limits_scope(db, settings):
+    settings.DJPT_QUERY_COLLECTION = EXECUTE_WRAPPER
+    with pytest.raises(LimitViolationError) as excinfo:
+        with QueryBatchLimit(total=0):
+            list(Group.objects.all())
+    lve = excinfo.value
+    unpickled = pickle.loads(pickle.dumps(lve))
+    assert str(unpickled) == str(lve)
+    assert (unpickled.name, unpickled.limit, unpickled.actual) == \
+        ('total', 0, '1')
@@ -0,0 +1,162 @@
+from django.contrib.auth.models import Group
+from django.template import loader
+from django_performance_testing.core import LimitViolationError
+from django_performance_testing.memory import \
+    MemoryCollector, MemoryLimit, MemoryResult, can_reset_peak, tracemalloc
+from django_performance_testing.serializer import Reader, Writer
+from django_performance_testing.signals import results_collected
+import pytest
+import threading
+import unittest
+from testapp.sixmock import patch
+from testapp.test_helpers import WithId, capture_result_collected, \
+    get_results, run_testcases_with_django_runner
+
+pytestmark = pytest.mark.skipif(
+    tracemalloc is None, reason='tracemalloc is not available')
+
+MB = 2**20
+# the objects the collector itself frees within the scope (e.g.: the tuple
+# returned by tracemalloc.get_traced_memory) make net a bit less
+SLACK = 1024
+
+
+def allocate(nbytes):
+    return bytearray(nbytes)
+
+
+def test_it_has_the_correct_attributes():
+    assert MemoryLimit.collector_cls == MemoryCollector
+    assert MemoryLimit.quantifier == 'many'
+    assert MemoryLimit.items_name == 'allocated bytes'
+
+
+def test_without_tracing_and_limits_nothing_is_measured():
+    assert not tracemalloc.is_tracing()
+    with capture_result_collected() as captured:
+        with MemoryCollector():
+            allocate(MB)
+    assert captured.calls[0]['results'] == []
+    assert not tracemalloc.is_tracing()
+
+
+def test_measures_every_scope_while_tracing_is_on():
+    tracemalloc.start()
+    try:
+        with capture_result_collected() as captured:
+            with MemoryCollector():
+                kept = allocate(MB)  # noqa: F841
+    finally:
+        tracemalloc.stop()
+    results = get_results(captured.calls[0])
+    assert MB - SLACK <= results['net'] < 2 * MB
+
+
+def test_can_limit_net_allocated_bytes():
+    with pytest.raises(LimitViolationError) as excinfo:
+        with MemoryLimit(net=MB):
+            kept = allocate(2 * MB)  # noqa: F841
+    assert excinfo.value.name == 'net'
+    assert excinfo.value.items_name == 'allocated bytes'
+    assert not tracemalloc.is_tracing()
+
+
+def test_peak_includes_memory_freed_within_the_scope():
+    with capture_result_collected() as captured:
+        with MemoryLimit(peak=10 * MB, net=MB):
+            allocate(2 * MB)
+    results = get_results(captured.calls[0])
+    assert results['peak'] >= 2 * MB
+    assert results['net'] < MB
+
+
+def test_violation_lists_the_top_allocation_sites():
+    with pytest.raises(LimitViolationError) as excinfo:
+        with MemoryLimit(peak=MB):
+            kept = allocate(2 * MB)  # noqa: F841
+    assert 'top allocation sites:' in excinfo.value.error_msg
+    assert 'bytes tests/testapp/tests/test_memory_limits.py:' in \
+        excinfo.value.error_msg
+
+
+def test_outer_peak_includes_the_peak_of_nested_scopes():
+    with capture_result_collected() as captured:
+        with MemoryLimit(peak=10 * MB):
+            with MemoryCollector():
+                allocate(2 * MB)
+            allocate(1024)
+    inner, outer = map(get_results, captured.calls)
+    assert outer['peak'] >= 2 * MB
+    if can_reset_peak():
+        assert inner['peak'] >= 2 * MB
+    else:
+        assert 'peak' not in inner
+
+
+def test_nested_scopes_take_no_snapshots(settings):
+    with patch('django_performance_testing.memory.take_snapshot') as mocked:
+        with pytest.raises(LimitViolationError) as excinfo:
+            with MemoryLimit(peak=10 * MB):
+                with MemoryLimit(net=MB):
+                    kept = allocate(2 * MB)  # noqa: F841
+    assert not mocked.called
+    assert 'top allocation sites:' not in excinfo.value.error_msg
+
+
+def test_tracing_is_kept_on_while_other_threads_measure():
+    entered, outer_exited = threading.Event(), threading.Event()
+    with capture_result_collected() as captured:
+
+        def measure_in_thread():
+            with MemoryCollector():
+                entered.set()
+                outer_exited.wait()
+                kept = allocate(MB)  # noqa: F841
+
+        thread = threading.Thread(target=measure_in_thread)
+        with MemoryLimit(net=10 * MB):
+            thread.start()
+            entered.wait()
+        outer_exited.set()
+        thread.join()
+    assert MB - SLACK <= get_results(captured.calls[1])['net'] < 2 * MB
+    assert not tracemalloc.is_tracing()
+
+
+def test_sites_are_stored_in_the_datafile(tmpfilepath):
+    writer = Writer(tmpfilepath)
+    writer.start()
+    results_collected.send(
+        sender=WithId('id'), context={}, results=[MemoryResult(
+            name='peak', value=3 * MB, sites=[('app.py:3', 2 * MB)])])
+    writer.end()
+    [(_, [decoded], _)] = Reader(tmpfilepath).read_all()
+    assert decoded.name == 'peak'
+    assert decoded.value == 3 * MB
+    assert decoded.sites == [('app.py:3', 2 * MB)]
+
+
+def test_can_limit_test_methods_through_settings(db, settings):
+    settings.PERFORMANCE_LIMITS = {'test method': {'memory': {'net': MB}}}
+
+    class ATestCase(unittest.TestCase):
+        kept = []
+
+        def test_allocating(self):
+            self.kept.append(allocate(2 * MB))
+
+    test_run = run_testcases_with_django_runner(
+        ATestCase, nr_of_tests=1, all_should_pass=False, print_bad=False)
+    assert 'total allocated bytes' not in test_run['output']
+    assert 'net allocated bytes (for test method) (limit: 1048576)' in \
+        test_run['output']
+
+
+def test_can_limit_template_rendering_through_settings(db, settings):
+    settings.PERFORMANCE_LIMITS = {'Template.render': {'memory': {'net': 0}}}
+    Group.objects.create(name='some group')
+    template = loader.get_template('all-group-names.markdown')
+    with pytest.raises(LimitViolationError) as excinfo:
+        template.render(context={'groups': Group.objects.all()})
+    assert excinfo.value.name == 'net'
+    assert excinfo.value.context == {'template': ['all-group-names.markdown']}
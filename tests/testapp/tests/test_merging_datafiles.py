@@ -0,0 +1,87 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import six
+from django.utils.six.moves import cPickle as pickle
+from django_performance_testing import serializer
+from django_performance_testing.signals import results_collected
+from testapp.test_helpers import WithId
+
+
+def write_datafile(fpath, records, batch_size=None):
+    writer = serializer.Writer(str(fpath), batch_size=batch_size)
+    writer.start()
+    for (sender, results, context) in records:
+        results_collected.send(
+            sender=sender, results=results, context=context)
+    writer.end()
+    return str(fpath)
+
+
+def read_datafile(fpath):
+    return [
+        (tuple(sender), results, context)
+        for (sender, results, context)
+        in serializer.Reader(str(fpath)).read_all()]
+
+
+def test_merged_datafile_has_the_records_of_all_inputs_in_order(tmpdir):
+    first = [
+        (WithId('one'), [1], {'node': ['first']}),
+        (WithId('two'), [2], {'node': ['first']}),
+    ]
+    second = [
+        (WithId('one'), [3], {'node': ['second']}),
+        (WithId('three'), [4], {'node': ['second']}),
+    ]
+    sources = [
+        write_datafile(tmpdir.join('first'), first),
+        write_datafile(tmpdir.join('second'), second, batch_size=1),
+    ]
+    target = str(tmpdir.join('merged'))
+    serializer.merge_datafiles(target, sources)
+    assert read_datafile(target) == first + second
+
+
+def test_can_merge_datafiles_of_the_pre_framed_format(tmpdir):
+    legacy = [(WithId('legacy'), [1], {'old': 'format'})]
+    legacy_path = str(tmpdir.join('legacy'))
+    with open(legacy_path, 'wb') as f:
+        f.write(pickle.dumps(legacy, pickle.HIGHEST_PROTOCOL))
+    current = [(WithId('current'), [2], {'new': 'format'})]
+    sources = [legacy_path, write_datafile(tmpdir.join('current'), current)]
+    target = str(tmpdir.join('merged'))
+    serializer.merge_datafiles(target, sources)
+    assert read_datafile(target) == legacy + current
+
+
+def test_merge_command_writes_to_the_datafile_path_by_default(
+        tmpdir, settings):
+    settings.DJPT_DATAFILE_PATH = str(tmpdir.join('merged'))
+    records = [(WithId('id'), [1], {'some': 'context'})]
+    source = write_datafile(tmpdir.join('source'), records)
+    stdout = six.StringIO()
+    call_command('djpt_merge', source, stdout=stdout)
+    assert read_datafile(settings.DJPT_DATAFILE_PATH) == records
+    assert 'Merged 1 datafiles into' in stdout.getvalue()
+
+
+def test_merge_command_refuses_to_overwrite_one_of_its_inputs(tmpdir):
+    records = [(WithId('id'), [1], {'some': 'context'})]
+    source = write_datafile(tmpdir.join('source'), records)
+    with pytest.raises(CommandError):
+        call_command('djpt_merge', source, output=source)
+    assert read_datafile(source) == records
+
+
+def test_worst_report_command_can_report_on_multiple_datafiles(tmpdir):
+    sources = [
+        write_datafile(tmpdir.join('first'), [
+            (WithId('id'), [1], {'node': 'first'})]),
+        write_datafile(tmpdir.join('second'), [
+            (WithId('id'), [5], {'node': 'second'})]),
+    ]
+    stdout = six.StringIO()
+    call_command('djpt_worst_report', *sources, stdout=stdout)
+    assert 'node: second' in stdout.getvalue()
+    assert 'node: first' not in stdout.getvalue()
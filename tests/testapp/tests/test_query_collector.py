@@ -1,11 +1,20 @@
+import os
 import pytest
+import threading
 from django.contrib.auth.models import Group
 from django.core import signals
-from django.db import connection, reset_queries
+from django.db import DatabaseError, connection, reset_queries
 from django.db.transaction import atomic
-from django_performance_testing.queries import QueryCollector
+from django_performance_testing.queries import \
+    QueryCollector, DEBUG_CURSOR, EXECUTE_WRAPPER
 from django_performance_testing.signals import results_collected
-from testapp.test_helpers import capture_result_collected
+from testapp.test_helpers import capture_result_collected, get_results
+
+
+@pytest.fixture(params=[DEBUG_CURSOR, EXECUTE_WRAPPER])
+def query_collection(request, settings):
+    settings.DJPT_QUERY_COLLECTION = request.param
+    return request.param
 
 
 @pytest.mark.parametrize(
@@ -17,7 +26,8 @@ from testapp.test_helpers import capture_result_collected
         (lambda: Group.objects.all().delete(), 1, 1, 0),
     ], ids=['insert', 'select', 'update', 'delete'])
 def test_captures_and_classifies_each_query_type(
-        db, code, total_lo_limit, write_lo_limit, read_lo_limit):
+        db, query_collection, code, total_lo_limit, write_lo_limit,
+        read_lo_limit):
 
     # 'coz of new, 'smart' delete need an item
     Group.objects.create(name='random')
@@ -42,7 +52,7 @@ def test_captures_and_classifies_each_query_type(
     assert_lo_limit('read', read_lo_limit)
 
 
-def test_collects_other_sql_statements_too(db):
+def test_collects_other_sql_statements_too(db, query_collection):
     with capture_result_collected() as captured:
         with QueryCollector():
             with atomic():
@@ -56,7 +66,7 @@ def test_collects_other_sql_statements_too(db):
     assert len(other_sqls.queries) == 2  # savepoint/release
 
 
-def test_captures_queries(db):
+def test_captures_queries(db, query_collection):
     with QueryCollector() as qc_insert:
         Group.objects.create(name='foo')
     assert len(qc_insert.queries) == 1
@@ -91,7 +101,7 @@ def test_resets_connection_debugcursor_into_expected_state(db):
         connection.force_debug_cursor = False
 
 
-def test_ctx_managers_can_be_nested(db):
+def test_ctx_managers_can_be_nested(db, query_collection):
     captured = {}
 
     def capture_signals(signal, sender, results, context):
@@ -111,7 +121,8 @@ def test_ctx_managers_can_be_nested(db):
         results_collected.disconnect(capture_signals)
 
 
-def test_collector_can_live_through_request_reseting_queries(db):
+def test_collector_can_live_through_request_reseting_queries(
+        db, query_collection):
     with QueryCollector() as qc:
         list(Group.objects.all())
         signals.request_started.send(sender=None)
@@ -120,3 +131,181 @@ def test_collector_can_live_through_request_reseting_queries(db):
         Group.objects.all().delete()
 
     assert len(qc.queries) == 3
+
+
+def test_queries_reset_by_other_threads_are_not_collected(
+        db, query_collection):
+    entered, reset_done = threading.Event(), threading.Event()
+    collected = []
+
+    def collect_in_thread():
+        with QueryCollector() as qc:
+            entered.set()
+            reset_done.wait()
+        collected.extend(qc.queries)
+
+    thread = threading.Thread(target=collect_in_thread)
+    thread.start()
+    entered.wait()
+    with QueryCollector():
+        for _ in range(10):
+            list(Group.objects.all())
+        reset_queries()
+    reset_done.set()
+    thread.join()
+    assert collected == []
+
+
+def test_execute_wrapper_collection_bypasses_the_debug_cursor(db, settings):
+    settings.DJPT_QUERY_COLLECTION = EXECUTE_WRAPPER
+    reset_queries()
+    with QueryCollector() as qc:
+        assert connection.force_debug_cursor is False
+        list(Group.objects.all())
+    assert connection.queries == []
+    assert len(qc.queries) == 1
+    assert qc.queries[0]['sql'].startswith('SELECT')
+    assert float(qc.queries[0]['time']) >= 0
+
+
+def test_execute_wrapper_collection_records_failing_queries_too(
+        db, settings):
+    settings.DJPT_QUERY_COLLECTION = EXECUTE_WRAPPER
+    with QueryCollector() as qc:
+        with pytest.raises(DatabaseError):
+            with atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT * FROM no_such_table')
+    assert 'no_such_table' in qc.queries[1]['sql']
+
+
+def test_collects_queries_of_every_database_alias(db, query_collection):
+    with capture_result_collected() as captured:
+        with QueryCollector():
+            list(Group.objects.all())
+            list(Group.objects.using('replica').all())
+            list(Group.objects.using('replica').all())
+    results = get_results(captured.calls[0])
+    assert results['total'] == 3
+    assert results['read'] == 3
+    assert results['default.read'] == 1
+    assert results['default.total'] == 1
+    assert results['replica.read'] == 2
+    assert results['replica.write'] == 0
+    assert results['replica.total'] == 2
+
+
+def test_collector_keeps_queries_of_every_alias_through_reset(
+        db, query_collection):
+    with QueryCollector() as qc:
+        list(Group.objects.using('replica').all())
+        reset_queries()
+        list(Group.objects.using('replica').all())
+    assert len(qc.queries_by_alias['replica']) == 2
+    assert len(qc.queries) == 2
+
+
+def test_no_per_alias_results_with_a_single_database():
+    qc = QueryCollector()
+    qc.queries = [{'sql': 'SELECT 1', 'time': '0.001'}]
+    qc.queries_by_alias = {'default': qc.queries}
+    names = sorted(r.name for r in qc.get_results_to_send())
+    assert names == [
+        'db_time', 'duplicates', 'other', 'read', 'slowest_query', 'total',
+        'write']
+
+
+def test_duplicates_are_the_most_repeated_query_fingerprint(
+        db, query_collection):
+    groups = [Group.objects.create(name=str(i)) for i in range(5)]
+    with capture_result_collected() as captured:
+        with QueryCollector():
+            for group in groups:
+                list(Group.objects.filter(pk=group.pk))  # N+1
+            list(Group.objects.filter(name='one'))
+            list(Group.objects.filter(name='two'))
+    duplicates, = (
+        r for r in captured.calls[0]['results'] if r.name == 'duplicates')
+    assert duplicates.value == 5
+    assert all('"id" =' in query['sql'] for query in duplicates.queries)
+
+
+def test_reports_time_spent_in_the_database():
+    qc = QueryCollector()
+    qc.queries = [
+        {'sql': 'SELECT 1', 'time': '0.002'},
+        {'sql': 'UPDATE "auth_group" SET "name" = 1', 'time': '0.010'},
+        {'sql': 'SELECT 2', 'time': '0.003'},
+    ]
+    results = dict((r.name, r) for r in qc.get_results_to_send())
+    assert results['db_time'].value == pytest.approx(0.015)
+    assert results['slowest_query'].value == pytest.approx(0.010)
+    assert results['slowest_query'].queries == [qc.queries[1]]
+
+
+def test_db_time_is_measured_for_executed_queries(db, query_collection):
+    with capture_result_collected() as captured:
+        with QueryCollector() as qc:
+            list(Group.objects.all())
+    results = dict((r.name, r) for r in captured.calls[0]['results'])
+    assert results['db_time'].value >= 0
+    assert results['slowest_query'].queries == [qc.queries[0]]
+
+
+def issue_query():
+    return list(Group.objects.all())  # the call site
+
+
+def test_records_the_application_code_issuing_the_query(
+        db, settings, query_collection):
+    settings.DJPT_QUERY_CALL_SITES = True
+    with QueryCollector() as qc:
+        issue_query()
+    site = qc.queries[0]['site']
+    assert site.startswith(os.path.join('tests', 'testapp', 'tests'))
+    assert site.endswith('in issue_query')
+
+
+def test_call_sites_are_matched_with_the_logged_queries(db, settings):
+    settings.DJPT_QUERY_COLLECTION = DEBUG_CURSOR
+    settings.DJPT_QUERY_CALL_SITES = True
+    with QueryCollector() as qc:
+        Group.objects.count()
+        reset_queries()
+        issue_query()
+    assert [query['site'].split(' in ')[1] for query in qc.queries] == [
+        'test_call_sites_are_matched_with_the_logged_queries', 'issue_query']
+    assert all('site' not in query for query in connection.queries)
+
+
+def test_does_not_record_call_sites_by_default(db, query_collection):
+    with QueryCollector() as qc:
+        issue_query()
+    assert 'site' not in qc.queries[0]
+
+
+def test_no_table_or_model_results_by_default(db):
+    with capture_result_collected() as captured:
+        with QueryCollector():
+            list(Group.objects.all())
+    names = [r.name for r in captured.calls[0]['results']]
+    assert not any(name.startswith(('table.', 'model.')) for name in names)
+
+
+def test_query_counts_can_be_broken_down_by_table_and_model(
+        db, query_collection, settings):
+    settings.DJPT_QUERY_BREAKDOWN = ['tables', 'models']
+    group = Group.objects.create(name='group')
+    with capture_result_collected() as captured:
+        with QueryCollector():
+            list(Group.objects.all())
+            list(group.user_set.all())
+            list(group.permissions.all())
+    results = get_results(captured.calls[0])
+    assert results['table.auth_group'] == 1
+    assert results['table.auth_user'] == 1
+    assert results['table.auth_user_groups'] == 1
+    assert results['table.auth_group_permissions'] == 1
+    assert results['model.auth.Group'] == 1
+    assert results['model.auth.User'] == 1
+    assert results['model.auth.User_groups'] == 1
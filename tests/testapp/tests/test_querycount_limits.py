@@ -1,11 +1,24 @@
 import pytest
 from django.contrib.auth.models import Group
 from django_performance_testing.queries import \
-    QueryCollector, QueryBatchLimit, QueryCountResult
+    QueryCollector, QueryBatchLimit, QueryCountResult, QueryTimeResult, \
+    DEBUG_CURSOR, EXECUTE_WRAPPER
 from django_performance_testing.core import LimitViolationError
 from testapp.test_helpers import override_current_context
 
 
+@pytest.fixture(params=[DEBUG_CURSOR, EXECUTE_WRAPPER])
+def query_collection(request, settings):
+    settings.DJPT_QUERY_COLLECTION = request.param
+    return request.param
+
+
+def run_queries(executed, nr_of_queries):
+    for i in range(nr_of_queries):
+        list(Group.objects.filter(name=str(i)))
+        executed.append(i)
+
+
 def test_it_has_the_correct_collector():
     assert QueryBatchLimit.collector_cls == QueryCollector
 
@@ -29,6 +42,96 @@ def test_integration_test_with_db(db):
     assert excinfo.value.name == 'total'
 
 
+def test_queries_can_be_limited_per_database_alias(db):
+    with pytest.raises(LimitViolationError) as excinfo:
+        with QueryBatchLimit(**{'replica.read': 0, 'default.read': 1}):
+            list(Group.objects.all())
+            list(Group.objects.using('replica').all())
+    assert excinfo.value.name == 'replica.read'
+    assert excinfo.value.actual == '1'
+
+
+def test_repeated_queries_can_be_limited(db):
+    with pytest.raises(LimitViolationError) as excinfo:
+        with QueryBatchLimit(duplicates=3):
+            for name in ['a', 'b', 'c', 'd']:
+                list(Group.objects.filter(name=name))
+    assert excinfo.value.name == 'duplicates'
+    assert excinfo.value.actual == '4'
+
+
+def test_time_spent_in_the_database_can_be_limited():
+    limit = QueryBatchLimit(db_time=0.01)
+    queries = [{'sql': 'SELECT 1', 'time': '0.006'}] * 2
+    with pytest.raises(LimitViolationError) as excinfo:
+        limit.handle_results(results=[
+            QueryTimeResult(name='db_time', queries=queries)], context=None)
+    assert excinfo.value.name == 'db_time'
+    assert excinfo.value.actual == '0.012'
+
+
+def test_violation_message_includes_the_top_call_sites():
+    limit = QueryBatchLimit(total=2)
+    queries = [
+        {'sql': 'SELECT 1', 'time': '0.001', 'site': 'app/views.py:3 in a'},
+        {'sql': 'SELECT 2', 'time': '0.001', 'site': 'app/views.py:9 in b'},
+        {'sql': 'SELECT 2', 'time': '0.001', 'site': 'app/views.py:9 in b'},
+    ]
+    with pytest.raises(LimitViolationError) as excinfo:
+        limit.handle_results(results=[
+            QueryCountResult(name='total', queries=queries)], context=None)
+    assert excinfo.value.error_msg.endswith(
+        'top call sites:\n'
+        '  2 app/views.py:9 in b\n'
+        '  1 app/views.py:3 in a')
+
+
+def test_fail_fast_limit_raises_at_the_query_crossing_it(db, query_collection):
+    executed = []
+    with pytest.raises(LimitViolationError) as excinfo:
+        with override_current_context() as ctx:
+            ctx.enter(key='some', value='context')
+            with QueryBatchLimit(read=3, fail_fast=True):
+                run_queries(executed, 100)
+    assert executed == [0, 1, 2]
+    assert excinfo.value.name == 'read'
+    assert excinfo.value.actual == '4'
+    assert excinfo.value.context == {'some': ['context']}
+    assert 'run_queries' in [entry.name for entry in excinfo.traceback]
+
+
+def test_fail_fast_limit_checks_duplicates_too(db, query_collection):
+    with pytest.raises(LimitViolationError) as excinfo:
+        with QueryBatchLimit(duplicates=2, fail_fast=True):
+            for _ in range(5):
+                list(Group.objects.filter(name='same'))
+    assert excinfo.value.name == 'duplicates'
+    assert excinfo.value.actual == '3'
+
+
+def test_settings_based_limits_can_fail_fast(db, settings):
+    settings.PERFORMANCE_LIMITS = {
+        'fail fast id': {'queries': {'total': 2, 'fail_fast': True}}}
+    # referenced, as the connected limits are tracked weakly
+    limit = QueryBatchLimit(  # noqa: F841
+        collector_id='fail fast id', settings_based=True)
+    executed = []
+    with pytest.raises(LimitViolationError) as excinfo:
+        with QueryCollector(id_='fail fast id'):
+            run_queries(executed, 100)
+    assert executed == [0, 1]
+    assert excinfo.value.collector_text == ' (for fail fast id)'
+
+
+def test_limits_are_only_checked_on_exit_by_default(db):
+    executed = []
+    with pytest.raises(LimitViolationError) as excinfo:
+        with QueryBatchLimit(read=3):
+            run_queries(executed, 10)
+    assert len(executed) == 10
+    assert excinfo.value.actual == '10'
+
+
 def test_type_limit_checks_are_performed_in_alphabetic_order_of_type_name():
     limit = QueryBatchLimit(c=3, b=2, a=1)
     with pytest.raises(LimitViolationError) as excinfo:
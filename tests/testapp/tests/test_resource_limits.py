@@ -0,0 +1,62 @@
+from django_performance_testing.core import LimitViolationError
+from django_performance_testing.resources import \
+    ResourceCollector, ResourceLimit, get_rss, resource
+import pytest
+import time
+from testapp.sixmock import patch
+from testapp.test_helpers import capture_result_collected, get_results
+
+pytestmark = pytest.mark.skipif(
+    resource is None, reason='the resource module is not available')
+
+
+def test_it_has_the_correct_attributes():
+    assert ResourceLimit.collector_cls == ResourceCollector
+    assert ResourceLimit.quantifier == 'many'
+    assert ResourceLimit.items_name == 'resource usage'
+
+
+def test_reports_the_resource_usage_deltas_of_the_scope():
+    with capture_result_collected() as captured:
+        with ResourceCollector():
+            pass
+    results = get_results(captured.calls[0])
+    assert set(results) == set([
+        'max_rss', 'minor_faults', 'major_faults', 'voluntary_switches',
+        'involuntary_switches', 'block_reads', 'block_writes'])
+    assert all(value >= 0 for value in results.values())
+
+
+def test_rss_is_only_read_for_the_scopes_limiting_it():
+    with patch('django_performance_testing.resources.get_rss') as get_rss:
+        with ResourceCollector():
+            pass
+        with ResourceLimit(voluntary_switches=100):
+            pass
+    assert not get_rss.called
+
+
+def test_waiting_is_a_voluntary_context_switch():
+    with capture_result_collected() as captured:
+        with ResourceCollector():
+            time.sleep(0.01)
+    assert get_results(captured.calls[0])['voluntary_switches'] >= 1
+
+
+@pytest.mark.skipif(get_rss() is None, reason='needs /proc/self/statm')
+def test_rss_grows_with_the_memory_touched_in_the_scope():
+    with capture_result_collected() as captured:
+        with ResourceLimit(rss=2**30):
+            kept = b'x' * (16 * 2**20)  # noqa: F841
+    results = get_results(captured.calls[0])
+    assert results['rss'] >= 8 * 2**20
+    assert results['minor_faults'] > 0
+
+
+def test_can_limit_resource_usage():
+    with pytest.raises(LimitViolationError) as excinfo:
+        with ResourceLimit(voluntary_switches=0):
+            time.sleep(0.01)
+    assert excinfo.value.name == 'voluntary_switches'
+    assert excinfo.value.base_error_msg.endswith(
+        'voluntary_switches resource usage (limit: 0)')
@@ -1,5 +1,8 @@
 import pytest
+from django.utils.six.moves import cPickle as pickle
 from django_performance_testing import serializer
+from django_performance_testing.core import NameValueResult
+from django_performance_testing.queries import QueryCollector, QueryCountResult
 from django_performance_testing.signals import results_collected, results_read
 from testapp.test_helpers import FakeSender, WithId
 
@@ -122,3 +125,181 @@ def test_roundtrip_serialization_single_results(
     reader = serializer.Reader(tmpfilepath)
     deserialized = reader.read_all()
     assert deserialized == [(sender, sample_result, context)]
+
+
+def test_datafile_batch_size_depends_on_setting(settings):
+    assert not hasattr(settings, 'DJPT_DATAFILE_BATCH_SIZE'), \
+        'test assumption'
+    assert serializer.get_datafile_batch_size() == 100
+    settings.DJPT_DATAFILE_BATCH_SIZE = 1
+    assert serializer.get_datafile_batch_size() == 1
+    settings.DJPT_DATAFILE_BATCH_SIZE = None
+    assert serializer.get_datafile_batch_size() is None
+
+
+def test_streaming_writer_flushes_every_batch_size_records(tmpfilepath):
+    writer = serializer.Writer(tmpfilepath, batch_size=2)
+    writer.start()
+    try:
+        reader = serializer.Reader(tmpfilepath)
+        assert reader.read_all() == []
+        results_collected.send(
+            sender=WithId('first'), results=[1], context={})
+        assert reader.read_all() == []
+        results_collected.send(
+            sender=WithId('second'), results=[2], context={})
+        assert reader.read_all() == [
+            (WithId('first'), [1], {}), (WithId('second'), [2], {})]
+        results_collected.send(
+            sender=WithId('third'), results=[3], context={})
+        assert len(reader.read_all()) == 2
+        assert len(writer.data) == 1, 'only the unflushed batch is in memory'
+    finally:
+        writer.end()
+    assert reader.read_all() == [
+        (WithId('first'), [1], {}), (WithId('second'), [2], {}),
+        (WithId('third'), [3], {})]
+    writer.end()  # no-op, the stream is already closed
+    assert len(reader.read_all()) == 3
+
+
+def test_reader_ignores_truncated_trailing_record(tmpfilepath):
+    writer = serializer.Writer(tmpfilepath, batch_size=1)
+    writer.start()
+    for i in range(3):
+        results_collected.send(
+            sender=WithId('id'), results=[i], context={})
+    writer.end()
+    with open(tmpfilepath, 'rb') as f:
+        data = f.read()
+    with open(tmpfilepath, 'wb') as f:
+        f.write(data[:-3])
+    reader = serializer.Reader(tmpfilepath)
+    assert reader.read_all() == [
+        (WithId('id'), [0], {}), (WithId('id'), [1], {})]
+
+
+def test_reader_can_read_pre_framed_format(tmpfilepath):
+    records = [(WithId('legacy'), [1], {'old': 'format'})]
+    with open(tmpfilepath, 'wb') as f:
+        f.write(pickle.dumps(records, pickle.HIGHEST_PROTOCOL))
+    reader = serializer.Reader(tmpfilepath)
+    assert reader.read_all() == records
+
+
+def test_reader_rejects_unknown_format_version(tmpfilepath):
+    with open(tmpfilepath, 'wb') as f:
+        f.write(serializer.FORMAT_MAGIC + b'\xff')
+    reader = serializer.Reader(tmpfilepath)
+    with pytest.raises(ValueError) as excinfo:
+        reader.read_all()
+    assert 'Unsupported datafile format version' in str(excinfo.value)
+
+
+def test_iter_all_decodes_and_signals_one_record_at_a_time(tmpfilepath):
+    writer = serializer.Writer(tmpfilepath)
+    writer.start()
+    for i in range(3):
+        results_collected.send(
+            sender=WithId('id'), results=[i], context={'nr': i})
+    writer.end()
+    signalled = []
+
+    def record_read_results(sender, results, context, **kwargs):
+        signalled.append(results)
+
+    results_read.connect(record_read_results)
+    try:
+        records = serializer.Reader(tmpfilepath).iter_all()
+        assert signalled == [], 'nothing is read before iterating'
+        assert next(records) == (WithId('id'), [0], {'nr': 0})
+        assert signalled == [[0]]
+        assert next(records) == (WithId('id'), [1], {'nr': 1})
+        assert signalled == [[0], [1]]
+        assert list(records) == [(WithId('id'), [2], {'nr': 2})]
+        assert signalled == [[0], [1], [2]]
+    finally:
+        results_read.disconnect(record_read_results)
+
+
+def test_sender_is_stored_as_a_lightweight_record(tmpfilepath):
+    collector = QueryCollector(id_='some id')
+    collector.queries = [{'sql': 'SELECT 1', 'time': '0.001'}] * 3
+    writer = serializer.Writer(tmpfilepath)
+    writer.start()
+    results_collected.send(
+        sender=collector, results=collector.get_results_to_send(),
+        context={'test name': ['test_foo']})
+    writer.end()
+    [(sender, results, context)] = serializer.Reader(tmpfilepath).read_all()
+    assert sender == serializer.SenderRecord(
+        id_='some id', type_name='queries')
+    assert context == {'test name': ['test_foo']}
+    total, = (r for r in results if r.name == 'total')
+    assert isinstance(total, QueryCountResult)
+    assert total.queries == collector.queries
+
+
+def test_repeated_values_are_stored_only_once(tmpfilepath):
+    sql = 'SELECT "auth_group"."id" FROM "auth_group" /* unique marker */'
+    writer = serializer.Writer(tmpfilepath)
+    writer.start()
+    for i in range(5):
+        queries = [{'sql': sql, 'time': '0.001'}] * (i + 1)
+        results_collected.send(
+            sender=WithId('id'),
+            results=[QueryCountResult(name='total', queries=queries)],
+            context={'test name': ['same test']})
+    writer.end()
+    with open(tmpfilepath, 'rb') as f:
+        data = f.read()
+    assert data.count(b'unique marker') == 1
+    assert data.count(b'same test') == 1
+    deserialized = serializer.Reader(tmpfilepath).read_all()
+    assert [len(r[1][0].queries) for r in deserialized] == [1, 2, 3, 4, 5]
+    assert all(r[1][0].queries[0]['sql'] == sql for r in deserialized)
+
+
+def test_interned_values_table_is_bounded(tmpfilepath):
+    writer = serializer.Writer(tmpfilepath)
+    writer.start()
+    writer.encoder.max_interned = 3
+    sent = []
+    for i in range(10):
+        record = (
+            WithId('id {}'.format(i % 4)), [NameValueResult('total', i)],
+            {'nr': [i % 3]})
+        sent.append(record)
+        results_collected.send(
+            sender=record[0], results=record[1], context=record[2])
+        assert len(writer.encoder.refs) <= 3 + 5
+    writer.end()
+    assert serializer.Reader(tmpfilepath).read_all() == sent
+
+
+def test_query_call_sites_are_stored(tmpfilepath):
+    queries = [
+        {'sql': 'SELECT 1', 'time': '0.001', 'site': 'app/views.py:3 in a'},
+        {'sql': 'SELECT 1', 'time': '0.001'},
+    ]
+    writer = serializer.Writer(tmpfilepath)
+    writer.start()
+    results_collected.send(
+        sender=WithId('id'),
+        results=[QueryCountResult(name='total', queries=queries)],
+        context={})
+    writer.end()
+    [(_, [total], _)] = serializer.Reader(tmpfilepath).read_all()
+    assert total.queries == queries
+
+
+def test_results_without_queries_are_stored_by_value(tmpfilepath):
+    writer = serializer.Writer(tmpfilepath)
+    writer.start()
+    results_collected.send(
+        sender=WithId('id'),
+        results=[QueryCountResult(name='total', value=3)], context={})
+    writer.end()
+    [(_, [total], _)] = serializer.Reader(tmpfilepath).read_all()
+    assert isinstance(total, QueryCountResult)
+    assert (total.value, total.queries, total.get_details()) == (3, None, '')
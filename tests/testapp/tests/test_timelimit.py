@@ -4,6 +4,9 @@ from django_performance_testing.timing import \
     TimeCollector, TimeLimit
 from freezegun import freeze_time
 import pytest
+import signal
+import threading
+import time
 
 
 def test_it_has_the_correct_collector():
@@ -23,3 +26,61 @@ def test_can_limit_elapsed_seconds(seconds):
                 frozen_time.tick(timedelta(seconds=seconds))
     assert excinfo.value.base_error_msg == \
         'Too many ({}) total elapsed seconds (limit: 0)'.format(seconds)
+
+
+def run_forever(max_seconds=5):
+    # stops eventually, so a broken watchdog fails the test, not the build
+    start = time.time()
+    while time.time() - start < max_seconds:
+        time.sleep(0.005)
+
+
+@pytest.mark.skipif(not hasattr(signal, 'setitimer'), reason='no setitimer')
+def test_watchdog_interrupts_scope_running_too_long():
+    start = time.time()
+    with pytest.raises(LimitViolationError) as excinfo:
+        with TimeLimit(total=0.01, watchdog=5):
+            run_forever()
+    assert time.time() - start < 1
+    assert excinfo.value.name == 'total'
+    assert 0.05 <= excinfo.value.result.value < 1
+    assert excinfo.value.error_msg.endswith('interrupted by the watchdog')
+    assert signal.getsignal(signal.SIGALRM) == signal.SIG_DFL
+    assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
+
+
+@pytest.mark.skipif(not hasattr(signal, 'setitimer'), reason='no setitimer')
+def test_watchdog_does_not_interrupt_scope_finishing_in_time():
+    with TimeLimit(total=1, watchdog=5):
+        time.sleep(0.01)
+    assert signal.getsignal(signal.SIGALRM) == signal.SIG_DFL
+    assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
+
+
+@pytest.mark.skipif(not hasattr(signal, 'setitimer'), reason='no setitimer')
+def test_nested_watchdogs_interrupt_at_the_earliest_deadline():
+    with TimeLimit(total=10, watchdog=5) as outer:
+        with pytest.raises(LimitViolationError) as excinfo:
+            with TimeLimit(total=0.01, watchdog=5) as inner:
+                run_forever()
+        assert excinfo.value.limit_obj is inner
+        assert signal.getitimer(signal.ITIMER_REAL)[0] > 0
+    assert excinfo.value.limit_obj is not outer
+    assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
+
+
+def test_watchdog_reports_from_thread_when_it_cannot_interrupt(capsys):
+    errors = []
+
+    def run_in_thread():
+        try:
+            with TimeLimit(total=0.01, watchdog=5):
+                time.sleep(0.3)
+        except LimitViolationError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run_in_thread)
+    thread.start()
+    thread.join()
+    assert 'DJPT watchdog: still running after' in capsys.readouterr().err
+    assert len(errors) == 1  # and reported as usual on exit
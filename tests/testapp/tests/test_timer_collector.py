@@ -2,7 +2,8 @@ from datetime import timedelta
 from django_performance_testing.timing import TimeCollector
 from freezegun import freeze_time
 import pytest
-from testapp.test_helpers import capture_result_collected
+import time
+from testapp.test_helpers import capture_result_collected, get_results
 
 
 @pytest.mark.parametrize('seconds', [10, 5, 0.04])
@@ -13,3 +14,25 @@ def test_captures_and_measures_elapsed_time(seconds):
                 frozen_time.tick(timedelta(seconds=seconds))
     assert len(captured.calls) == 1
     assert pytest.approx(seconds) == captured.calls[0]['results'][0].value
+
+
+def test_waiting_is_measured_as_wait_not_cpu_time():
+    with capture_result_collected() as captured:
+        with TimeCollector():
+            time.sleep(0.1)
+    results = get_results(captured.calls[0])
+    assert results['total'] >= 0.1
+    assert results['cpu'] < 0.05
+    assert results['wait'] == pytest.approx(
+        results['total'] - results['cpu'])
+
+
+def test_computing_is_measured_as_cpu_time():
+    with capture_result_collected() as captured:
+        with TimeCollector():
+            start = time.time()
+            while time.time() - start < 0.1:
+                pass
+    results = get_results(captured.calls[0])
+    assert results['cpu'] >= 0.05
+    assert results['wait'] >= 0